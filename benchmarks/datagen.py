@@ -0,0 +1,277 @@
+# Deterministic synthetic tenant data for the benchmarks: organizations with HR admin users,
+# departments, projects, employees in manager chains, sessions, parameters and ratings.
+#
+#   python -m benchmarks.datagen --employees 100000
+#
+# The same scale and seed always produce the same rows and ids, so numbers measured on
+# different commits compare like for like. Writes to DATABASE_URL (a SQLite file in the temp
+# directory by default) after dropping every table and re-running the migrations.
+import argparse
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "eagles_bench.db"))
+
+from sqlalchemy import insert, text
+from database import BASE, engine
+from migrations import load_models, run_migrations, schema_version
+from models.organization import Organization
+from models.user import Users
+from models.departments import Department
+from models.project import Project
+from models.employee import Employee
+from models.manager import Manager
+from models.session import SessionModel
+from models.performanceparameter import PerformanceParameter
+from models.performancerating import PerformanceRating
+from models.sessionentry import SessionEntryModal
+from router.hierarchy import rebuild_hierarchy
+from router.rating_rollups import rebuild_rollups
+from settings import settings
+
+PASSWORD = "benchmark"
+# Fixed salt so the generated hash, like every other row, is the same on every run
+PASSWORD_SALT = "eaglesbenchmarkdatage."
+PARAMETER_NAMES = ["Quality", "Delivery", "Ownership", "Collaboration", "Communication", "Learning"]
+# Session statuses are computed against this date, not today, so they don't drift between runs
+AS_OF = date(2026, 6, 15)
+FIRST_SESSION = date(2025, 1, 1)
+
+
+@dataclass(frozen=True)
+class Scale:
+    employees: int
+    organizations: int
+    departments: int  # departments and projects in total, split evenly across organizations
+    projects: int
+    sessions: int  # per organization
+    parameters: int  # shared by every organization
+    sessions_per_employee: int  # sessions each employee is rated in, every parameter each time
+    fan_out: int  # direct reports per manager
+    session_entries: bool = False  # mirror the ratings into tbl_sessionentry
+
+    @classmethod
+    def for_employees(cls, employees: int, **overrides) -> "Scale":
+        scale = cls(
+            employees=employees,
+            organizations=max(1, employees // 1000),
+            departments=max(1, employees // 500),
+            projects=max(1, employees // 50),
+            sessions=24,
+            parameters=3,
+            sessions_per_employee=2,
+            fan_out=8,
+        )
+        return replace(scale, **overrides)
+
+    @property
+    def ratings(self) -> int:
+        return self.employees * min(self.sessions_per_employee, self.sessions) * self.parameters
+
+    # Every organization owns a contiguous block of employees (the last one takes the remainder),
+    # departments, projects and sessions
+    @property
+    def org_employees(self) -> int:
+        return self.employees // self.organizations
+
+    @property
+    def org_departments(self) -> int:
+        return max(1, self.departments // self.organizations)
+
+    @property
+    def org_projects(self) -> int:
+        return max(1, self.projects // self.organizations)
+
+
+def org_of(i: int, scale: Scale) -> int:
+    return min(i // scale.org_employees, scale.organizations - 1) + 1
+
+
+def org_range(org_id: int, scale: Scale) -> range:
+    start = (org_id - 1) * scale.org_employees
+    return range(start, scale.employees if org_id == scale.organizations else start + scale.org_employees)
+
+
+# Within its organization's block, employee i (0-based) reports to the one (i - 1) // fan_out
+# places from the start, the block's first employee is the root of every chain
+def manager_of(i: int, scale: Scale):
+    start = org_range(org_of(i, scale), scale).start
+    return start + (i - start - 1) // scale.fan_out if i > start else None
+
+
+def is_manager(i: int, scale: Scale) -> bool:
+    block = org_range(org_of(i, scale), scale)
+    return block.start + (i - block.start) * scale.fan_out + 1 < block.stop
+
+
+def managers(org_id: int, scale: Scale) -> range:
+    block = org_range(org_id, scale)
+    return range(block.start, block.start + max(1, (len(block) - 1 + scale.fan_out - 1) // scale.fan_out))
+
+
+def project_of(i: int, scale: Scale) -> int:
+    org_id = org_of(i, scale)
+    return (org_id - 1) * scale.org_projects + i % scale.org_projects + 1
+
+
+def department_of_project(project_id: int, scale: Scale) -> int:
+    org_index, local = divmod(project_id - 1, scale.org_projects)
+    return org_index * scale.org_departments + local % scale.org_departments + 1
+
+
+def session_ids(org_id: int, scale: Scale) -> range:
+    return range((org_id - 1) * scale.sessions + 1, org_id * scale.sessions + 1)
+
+
+def session_dates(s: int):
+    start = FIRST_SESSION + timedelta(days=30 * s)
+    return start, start + timedelta(days=29)
+
+
+def session_status(start: date, end: date) -> str:
+    if AS_OF < start:
+        return "New"
+    return "Active" if AS_OF <= end else "Closed"
+
+
+def admin_email(org_id: int) -> str:
+    return f"admin{org_id}@example.com"
+
+
+def password_hash() -> str:
+    from passlib.hash import bcrypt
+    return bcrypt.using(rounds=settings.bcrypt_rounds, salt=PASSWORD_SALT).hash(PASSWORD)
+
+
+def bulk_insert(conn, model, rows, chunk=10000):
+    for start in range(0, len(rows), chunk):
+        conn.execute(insert(model), rows[start:start + chunk])
+
+
+def reset(engine):
+    metadata = load_models()
+    metadata.drop_all(engine)
+    schema_version.drop(engine, checkfirst=True)
+    run_migrations(engine)
+
+
+def analyze(conn):
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        conn.execute(text("ANALYZE"))
+    elif dialect == "mysql":
+        for table in BASE.metadata.sorted_tables:
+            conn.execute(text(f"ANALYZE TABLE {table.name}"))
+
+
+def generate(scale: Scale, seed: int = 1):
+    rng = random.Random(seed)
+    hashed = password_hash()
+    reset(engine)
+    with engine.begin() as conn:
+        bulk_insert(conn, Organization, [
+            {"org_id": o, "org_name": f"Org {o}", "org_email": f"org{o}@example.com",
+             "org_mobile_number": "0000000000", "password": hashed, "full_name": f"Admin {o}"}
+            for o in range(1, scale.organizations + 1)
+        ])
+        # One HR admin per organization to log in with, then one user per employee
+        admins = [
+            {"user_id": o, "org_id": o, "user_name": f"Admin {o}", "user_email": admin_email(o),
+             "role": "HR Admin", "user_password": hashed, "is_active": True, "is_deleted": False}
+            for o in range(1, scale.organizations + 1)
+        ]
+        bulk_insert(conn, Users, admins + [
+            {"user_id": scale.organizations + i + 1, "org_id": org_of(i, scale), "user_name": f"User {i}",
+             "user_email": f"user{i}@example.com", "role": "Manager" if is_manager(i, scale) else "Member",
+             "user_password": hashed, "is_active": True, "is_deleted": False}
+            for i in range(scale.employees)
+        ])
+        bulk_insert(conn, Department, [
+            {"department_id": d, "department_name": f"Department {d - 1}", "org_id": (d - 1) // scale.org_departments + 1}
+            for d in range(1, scale.org_departments * scale.organizations + 1)
+        ])
+        bulk_insert(conn, Project, [
+            {"project_id": p, "project_name": f"Project {p - 1}", "department_id": department_of_project(p, scale),
+             "org_id": (p - 1) // scale.org_projects + 1}
+            for p in range(1, scale.org_projects * scale.organizations + 1)
+        ])
+        employees = []
+        for i in range(scale.employees):
+            manager = manager_of(i, scale)
+            project_id = project_of(i, scale)
+            employees.append({
+                "emp_id": i + 1, "employee_id": f"E{i:07d}", "employee_name": f"Employee {i}",
+                "designation": rng.choice(("Engineer", "Senior Engineer", "Analyst", "Designer")),
+                "role": "Manager" if is_manager(i, scale) else "Member",
+                "manager_name": f"Employee {manager}" if manager is not None else None,
+                "manager_id": manager + 1 if manager is not None else None,
+                "project_id": project_id, "department_id": department_of_project(project_id, scale),
+                "org_id": org_of(i, scale),
+            })
+        bulk_insert(conn, Employee, employees)
+        bulk_insert(conn, Manager, [
+            {"manager_id": row["emp_id"], "manager_name": row["employee_name"]}
+            for row in employees if row["role"] == "Manager"
+        ])
+        rebuild_hierarchy(conn)
+
+        sessions = []
+        for o in range(1, scale.organizations + 1):
+            for s, session_id in enumerate(session_ids(o, scale)):
+                start, end = session_dates(s)
+                sessions.append({"session_id": session_id, "session_name": f"Session {session_id - 1}", "start_date": start,
+                                 "end_date": end, "status": session_status(start, end), "org_id": o})
+        bulk_insert(conn, SessionModel, sessions)
+        bulk_insert(conn, PerformanceParameter, [
+            {"parameter_id": p + 1, "name": PARAMETER_NAMES[p % len(PARAMETER_NAMES)] + ("" if p < len(PARAMETER_NAMES) else f" {p}"),
+             "min_rating": 1, "max_rating": 5}
+            for p in range(scale.parameters)
+        ])
+
+        # Employee i is rated in its organization's sessions i, i + step, ... so every session
+        # gets an even share
+        per_employee = min(scale.sessions_per_employee, scale.sessions)
+        step = max(1, scale.sessions // per_employee)
+        ratings = []
+        for i in range(scale.employees):
+            org_id = org_of(i, scale)
+            first_session = session_ids(org_id, scale).start
+            for k in range(per_employee):
+                session_id = first_session + (i + k * step) % scale.sessions
+                for p in range(scale.parameters):
+                    ratings.append({"emp_id": i + 1, "session_id": session_id, "parameter_id": p + 1,
+                                    "rating": rng.randint(1, 5), "comments": "", "org_id": org_id})
+            if len(ratings) >= 50000:
+                bulk_insert(conn, PerformanceRating, ratings)
+                if scale.session_entries:
+                    bulk_insert(conn, SessionEntryModal, ratings)
+                ratings = []
+        bulk_insert(conn, PerformanceRating, ratings)
+        if scale.session_entries:
+            bulk_insert(conn, SessionEntryModal, ratings)
+        rebuild_rollups(conn)
+        analyze(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate deterministic benchmark data into DATABASE_URL")
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--sessions", type=int)
+    parser.add_argument("--parameters", type=int)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    overrides = {key: value for key, value in (("sessions", args.sessions), ("parameters", args.parameters)) if value}
+    scale = Scale.for_employees(args.employees, **overrides)
+    start = time.perf_counter()
+    generate(scale, args.seed)
+    print(f"generated {scale} ({scale.ratings} ratings) in {time.perf_counter() - start:.1f}s "
+          f"into {engine.url.render_as_string(hide_password=True)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Statement count and latency of the employee read endpoints as the table grows.
+#
+#   python -m benchmarks.employee_queries --sizes 10 100 1000 10000
+#
+# Runs against DATABASE_URL (an in-memory SQLite database by default) and compares
+# the joined read used by the router with the old per-row project/department lookups.
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import event, delete
+from database import engine, session_local
+from migrations import load_models
+from models.departments import Department
+from models.organization import Organization
+from models.project import Project
+from models.employee import Employee
+from router.employee import get_all_employees, get_employee, EmployeeResponse
+from router.pagination import PageParams
+from router.tenancy import Tenant, current_tenant
+from settings import settings
+
+ORG_ID = 1
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self)
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def create_organization(db):
+    if db.get(Organization, ORG_ID) is None:
+        db.add(Organization(
+            org_id=ORG_ID, org_name="Benchmark", org_email="benchmark@example.com",
+            org_mobile_number="0000000000", password="-", full_name="Benchmark",
+        ))
+        db.commit()
+
+
+def seed(db, size: int):
+    db.execute(delete(Employee))
+    db.execute(delete(Project))
+    db.execute(delete(Department))
+    departments = [Department(department_name=f"Department {i}", org_id=ORG_ID) for i in range(max(1, size // 100))]
+    db.add_all(departments)
+    db.flush()
+    projects = [
+        Project(project_name=f"Project {i}", department_id=departments[i % len(departments)].department_id, org_id=ORG_ID)
+        for i in range(max(1, size // 20))
+    ]
+    db.add_all(projects)
+    db.flush()
+    db.add_all([
+        Employee(
+            employee_id=f"E{i:07d}",
+            employee_name=f"Employee {i}",
+            designation="Engineer",
+            role="Member",
+            manager_name=f"Employee {i // 10}",
+            department_id=departments[i % len(departments)].department_id,
+            project_id=projects[i % len(projects)].project_id,
+            org_id=ORG_ID,
+        )
+        for i in range(size)
+    ])
+    db.commit()
+
+
+# The read path before the joined query: one Project query and one department lazy load per row
+def legacy_get_all_employees(db):
+    responses = []
+    for employee in db.query(Employee).all():
+        project_name = None
+        if employee.project_id:
+            project = db.query(Project).filter(Project.project_id == employee.project_id).first()
+            project_name = project.project_name if project else None
+        responses.append(EmployeeResponse(
+            employee_id=employee.employee_id,
+            emp_id=employee.emp_id,
+            employee_name=employee.employee_name,
+            designation=employee.designation,
+            project_name=project_name,
+            role=employee.role,
+            manager_name=employee.manager_name,
+            department_name=employee.department.department_name if employee.department else None,
+        ))
+    return responses
+
+
+# First page at the largest page size, the listing endpoint no longer returns the whole table
+def list_first_page(db):
+    return get_all_employees(db, PageParams(limit=settings.page_size_max, cursor=None, include_total=False))
+
+
+def measure(counter, fn, *args):
+    db = session_local()
+    try:
+        before = counter.count
+        start = time.perf_counter()
+        fn(*args, db)
+        return counter.count - before, (time.perf_counter() - start) * 1000
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--skip-legacy", action="store_true", help="don't time the N+1 version on large sizes")
+    args = parser.parse_args()
+
+    load_models().create_all(bind=engine)
+    with session_local() as db:
+        create_organization(db)
+    # Scoped like a signed-in request of the benchmark organization
+    current_tenant.set(Tenant(org_id=ORG_ID))
+    counter = StatementCounter(engine)
+
+    print(f"{'employees':>10} {'list stmts':>11} {'list ms':>9} {'get stmts':>10} {'legacy stmts':>13} {'legacy ms':>10}")
+    list_counts = set()
+    for size in args.sizes:
+        db = session_local()
+        seed(db, size)
+        db.close()
+
+        list_stmts, list_ms = measure(counter, list_first_page)
+        get_stmts, _ = measure(counter, get_employee, 1)
+        legacy = ("-", "-") if args.skip_legacy else measure(counter, legacy_get_all_employees)
+        list_counts.add(list_stmts)
+        legacy_ms = legacy[1] if isinstance(legacy[1], str) else f"{legacy[1]:.1f}"
+        print(f"{size:>10} {list_stmts:>11} {list_ms:>9.1f} {get_stmts:>10} {legacy[0]:>13} {legacy_ms:>10}")
+
+    assert len(list_counts) == 1, f"statement count grew with the table: {sorted(list_counts)}"
+    print("statement count is constant:", list_counts.pop())
+
+
+if __name__ == "__main__":
+    main()
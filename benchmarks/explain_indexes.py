@@ -0,0 +1,111 @@
+# Checks through EXPLAIN that the routers' hot lookups are served by an index, not a table scan.
+#
+#   python -m benchmarks.explain_indexes --employees 50000
+#
+# Seeds DATABASE_URL (a temporary SQLite file by default) with benchmarks.datagen, which also
+# refreshes planner statistics, and fails if any plan scans the filtered table. Supports
+# SQLite, MySQL and PostgreSQL plans.
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "explain_indexes.db"))
+
+from sqlalchemy import select, text
+from benchmarks.datagen import Scale, generate
+from database import engine
+from models.user import Users
+from models.departments import Department
+from models.project import Project
+from models.employee import Employee
+from models.employeehierarchy import EmployeeHierarchy
+from models.session import SessionModel
+from models.performancerating import PerformanceRating
+from models.sessionentry import SessionEntryModal
+
+
+# (label, table expected to be searched by index, statement as the router issues it)
+def hot_queries():
+    return [
+        ("employees by manager", "tbl_employee", select(Employee).where(Employee.manager_name == "Employee 42")),
+        ("direct reports", "tbl_employee", select(Employee).where(Employee.manager_id == 42)),
+        ("reports subtree", "tbl_employee_hierarchy",
+         select(EmployeeHierarchy.descendant_id).where(EmployeeHierarchy.ancestor_id == 42, EmployeeHierarchy.depth >= 1)),
+        ("managers", "tbl_employee", select(Employee.emp_id, Employee.employee_name).where(Employee.role == "Manager")),
+        ("project by name", "tbl_project", select(Project).where(Project.project_name == "Project 7")),
+        ("department by name", "tbl_department", select(Department).where(Department.department_name == "Department 3")),
+        ("login by email", "tbl_users", select(Users).where(Users.user_email == "user42@example.com", Users.is_deleted == False)),
+        ("users of organization", "tbl_users", select(Users).where(Users.org_id == 3, Users.is_deleted == False)),
+        ("active sessions", "tbl_session",
+         select(SessionModel).where(SessionModel.status == "Active", SessionModel.end_date >= date(2026, 6, 1))),
+        ("ratings of session", "tbl_performance_rating",
+         select(PerformanceRating.parameter_id, PerformanceRating.rating).where(PerformanceRating.session_id == 2)),
+        ("ratings of employee in session", "tbl_performance_rating",
+         select(PerformanceRating).where(PerformanceRating.session_id == 2, PerformanceRating.emp_id == 42)),
+        ("session entries of employee", "tbl_sessionentry",
+         select(SessionEntryModal).where(SessionEntryModal.session_id == 2, SessionEntryModal.emp_id == 42)),
+        # The same listings as a tenant sees them, with the org_id criteria the session adds
+        ("employees of tenant", "tbl_employee",
+         select(Employee).where(Employee.org_id == 3, Employee.emp_id > 2500).order_by(Employee.emp_id).limit(100)),
+        ("managers of tenant", "tbl_employee",
+         select(Employee.emp_id).where(Employee.org_id == 3, Employee.role == "Manager")),
+        ("projects of tenant", "tbl_project", select(Project).where(Project.org_id == 3).order_by(Project.project_id)),
+        ("active sessions of tenant", "tbl_session",
+         select(SessionModel).where(SessionModel.org_id == 3, SessionModel.status == "Active",
+                                    SessionModel.end_date >= date(2026, 6, 1))),
+        ("ratings of tenant session", "tbl_performance_rating",
+         select(PerformanceRating.rating).where(PerformanceRating.org_id == 3, PerformanceRating.session_id == 402)),
+    ]
+
+
+def seed(employees: int):
+    # Many small sessions, so "ratings of session" is as selective as it is in production
+    generate(Scale.for_employees(employees, sessions=200, parameters=1, session_entries=True))
+
+
+def explain(conn, statement):
+    compiled = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return [row.detail for row in conn.execute(text("EXPLAIN QUERY PLAN " + compiled))]
+    if dialect == "mysql":
+        return [dict(row._mapping) for row in conn.execute(text("EXPLAIN " + compiled))]
+    return [row[0] for row in conn.execute(text("EXPLAIN " + compiled))]
+
+
+# True when the plan reads `table` through an index
+def uses_index(dialect: str, table: str, plan) -> bool:
+    if dialect == "sqlite":
+        steps = [step for step in plan if f" {table} " in f" {step} "]
+        return bool(steps) and all(step.startswith("SEARCH") for step in steps)
+    if dialect == "mysql":
+        steps = [step for step in plan if step["table"] == table]
+        return bool(steps) and all(step["type"] != "ALL" and step["key"] for step in steps)
+    steps = [step for step in plan if f" on {table}" in step]
+    return bool(steps) and not any("Seq Scan" in step for step in steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot lookups against a seeded database")
+    parser.add_argument("--employees", type=int, default=20000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.employees)
+    print(f"seeded {args.employees} employees in {time.perf_counter() - start:.1f}s ({engine.dialect.name})")
+
+    failures = []
+    with engine.connect() as conn:
+        for label, table, statement in hot_queries():
+            plan = explain(conn, statement)
+            ok = uses_index(conn.dialect.name, table, plan)
+            print(f"{'ok  ' if ok else 'SCAN'} {label:32} {plan}")
+            if not ok:
+                failures.append(label)
+    assert not failures, f"full scans: {', '.join(failures)}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# HTTP load test over the main endpoint of every router, reporting throughput and
+# p50/p95/p99 per endpoint.
+#
+#   python -m benchmarks.loadtest --employees 10000 --requests 5000 --concurrency 16 --output run.json
+#   python -m benchmarks.loadtest --no-generate --compare run.json       # same data, new commit
+#   python -m benchmarks.loadtest --url http://staging:8000 --no-generate --employees 100000
+#
+# Without --url it generates the data with benchmarks.datagen into DATABASE_URL (a SQLite file
+# by default; point it at a local MySQL for the MySQL numbers) and starts uvicorn against it,
+# with the session status scheduler off so the data stays as generated. The request mix comes
+# from a seeded RNG, so two runs with the same arguments send the same requests.
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+from benchmarks import datagen  # sets the default DATABASE_URL
+from benchmarks.report import print_report, save, load, summarize
+
+import httpx
+from database import engine
+from router.pagination import encode_cursor
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    weight: int
+    build: Callable  # (rng, scale, org_id) -> (method, url, request kwargs)
+
+
+# Every id a request names belongs to the requesting organization, as it would in production
+def pick_manager(rng, scale, org: int) -> int:
+    return rng.choice(datagen.managers(org, scale))
+
+
+def pick_employee(rng, scale, org: int) -> int:
+    return rng.choice(datagen.org_range(org, scale))
+
+
+def pick_session(rng, scale, org: int) -> int:
+    return rng.choice(datagen.session_ids(org, scale))
+
+
+def ratings_payload(rng, scale, manager: int):
+    block = datagen.org_range(datagen.org_of(manager, scale), scale)
+    first = block.start + (manager - block.start) * scale.fan_out + 1
+    reports = range(first, min(first + scale.fan_out, block.stop))
+    return [
+        {"emp_id": i + 1, "ratings": [{"parameter_id": p + 1, "rating": rng.randint(1, 5)} for p in range(scale.parameters)]}
+        for i in reports
+    ]
+
+
+def endpoints() -> List[Endpoint]:
+    def get(path, **params):
+        return "GET", path, {"params": params}
+
+    return [
+        Endpoint("health ready", 1, lambda rng, scale, org: get("/health/ready")),
+        Endpoint("login", 1, lambda rng, scale, org: ("POST", "/Login/token/", {
+            "data": {"username": datagen.admin_email(org), "password": datagen.PASSWORD}})),
+        Endpoint("users me", 2, lambda rng, scale, org: get("/Login/users/me/")),
+        Endpoint("departments list", 4, lambda rng, scale, org: get("/Departments/departments/")),
+        Endpoint("departments tree", 2, lambda rng, scale, org: get("/Departments/departments/tree")),
+        Endpoint("managers", 2, lambda rng, scale, org: get("/Manager/manager/")),
+        Endpoint("projects list", 4, lambda rng, scale, org: get("/Project/projects/", limit=100)),
+        Endpoint("employees list", 6, lambda rng, scale, org: get(
+            "/Employee/employees/", limit=100, cursor=encode_cursor([pick_employee(rng, scale, org)]))),
+        Endpoint("employee by id", 6, lambda rng, scale, org: get(f"/Employee/employees/{pick_employee(rng, scale, org) + 1}")),
+        Endpoint("employee reports", 4, lambda rng, scale, org: get(
+            f"/Employee/employees/{pick_manager(rng, scale, org) + 1}/reports", depth=2)),
+        Endpoint("parameters", 3, lambda rng, scale, org: get("/PerformanceParameter/parameters")),
+        Endpoint("sessions list", 3, lambda rng, scale, org: get("/Session/sessions/", status="Active")),
+        Endpoint("organization", 2, lambda rng, scale, org: get(f"/Organization/get-organization/{org}")),
+        Endpoint("users list", 2, lambda rng, scale, org: get("/User/get-all-users/", limit=100)),
+        Endpoint("session entry sessions", 2, lambda rng, scale, org: get("/SessionEntry/api/sessions")),
+        Endpoint("session employees", 8, lambda rng, scale, org: get(
+            f"/PerformanceRating/session/{pick_session(rng, scale, org)}/employees",
+            manager_name=f"Employee {pick_manager(rng, scale, org)}")),
+        Endpoint("session analytics", 2, lambda rng, scale, org: get(
+            f"/PerformanceRating/session/{pick_session(rng, scale, org)}/analytics")),
+        Endpoint("session rollup", 3, lambda rng, scale, org: get(
+            f"/PerformanceRating/session/{pick_session(rng, scale, org)}/rollup", by=rng.choice(("parameter", "department")))),
+        Endpoint("session export", 1, lambda rng, scale, org: get(
+            f"/PerformanceRating/session/{pick_session(rng, scale, org)}/export", format="ndjson")),
+        Endpoint("rate team", 3, lambda rng, scale, org: (lambda manager: ("POST",
+            f"/PerformanceRating/session/{pick_session(rng, scale, org)}/rate",
+            {"params": {"manager_name": f"Employee {manager}"}, "json": {"ratings": ratings_payload(rng, scale, manager)}}
+        ))(pick_manager(rng, scale, org))),
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": engine.url.render_as_string(hide_password=False),
+        "SESSION_STATUS_SCHEDULER": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def login(client: httpx.AsyncClient, org: int) -> str:
+    response = await client.post("/Login/token/", data={"username": datagen.admin_email(org), "password": datagen.PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+# The whole request list is drawn up front from one seeded RNG, so only the interleaving
+# across workers differs between runs
+def plan(scale, requests: int, seed: int) -> list:
+    rng = random.Random(seed)
+    table = endpoints()
+    weights = [endpoint.weight for endpoint in table]
+    planned = []
+    for endpoint in rng.choices(table, weights, k=requests):
+        org = rng.randrange(scale.organizations) + 1
+        planned.append((endpoint.name, org, *endpoint.build(rng, scale, org)))
+    return planned
+
+
+async def run(client, scale, tokens, requests: int, concurrency: int, seed: int) -> Tuple[list, float]:
+    pending = iter(plan(scale, requests, seed))
+    samples = []
+
+    async def worker():
+        for name, org, method, url, kwargs in pending:
+            headers = {"Authorization": f"Bearer {tokens[org]}"}
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=headers, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 599
+            samples.append((name, time.perf_counter() - start, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def main_async(args, scale):
+    process = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        process = start_server(port)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client)
+            tokens = {org: await login(client, org) for org in range(1, scale.organizations + 1)}
+            if args.warmup:
+                await run(client, scale, tokens, args.warmup, args.concurrency, args.seed + 1)
+            return await run(client, scale, tokens, args.requests, args.concurrency, args.seed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test every router against generated data")
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--no-generate", action="store_true", help="reuse the data already in DATABASE_URL")
+    parser.add_argument("--output", help="save the report as JSON")
+    parser.add_argument("--compare", help="baseline report to diff the percentiles against")
+    args = parser.parse_args()
+
+    scale = datagen.Scale.for_employees(args.employees)
+    if not args.no_generate:
+        start = time.perf_counter()
+        datagen.generate(scale, args.seed)
+        print(f"generated {args.employees} employees in {time.perf_counter() - start:.1f}s")
+
+    samples, elapsed = asyncio.run(main_async(args, scale))
+    report = summarize(samples, elapsed, {
+        "employees": args.employees,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "database": engine.dialect.name,
+    })
+    print_report(report, load(args.compare) if args.compare else None)
+    if args.output:
+        save(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
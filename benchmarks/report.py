@@ -0,0 +1,94 @@
+# Throughput and latency percentiles per endpoint from a load test run, saved as JSON so a
+# run on one commit can be compared with a run on another.
+#
+#   python -m benchmarks.report results.json                       # print a saved run
+#   python -m benchmarks.report results.json --compare baseline.json
+import argparse
+import json
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+PERCENTILES = (0.50, 0.95, 0.99)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))] if sorted_values else 0.0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# samples: (endpoint, seconds, status) for every request of the measured phase
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float, meta: dict) -> dict:
+    by_endpoint: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    for name, seconds, status in samples:
+        by_endpoint[name].append((seconds, status))
+
+    def stats(results):
+        latencies = sorted(seconds for seconds, _ in results)
+        row = {
+            "requests": len(results),
+            "errors": sum(1 for _, status in results if status >= 400),
+            "rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        }
+        for p in PERCENTILES:
+            row[f"p{int(p * 100)}_ms"] = round(percentile(latencies, p) * 1000, 3)
+        return row
+
+    return {
+        "meta": {**meta, "commit": git_commit(), "elapsed_s": round(elapsed, 3)},
+        "total": stats([(seconds, status) for _, seconds, status in samples]),
+        "endpoints": {name: stats(results) for name, results in sorted(by_endpoint.items())},
+    }
+
+
+def change(current: float, baseline: float) -> str:
+    if not baseline:
+        return ""
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
+
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    meta = report["meta"]
+    print(" ".join(f"{key}={value}" for key, value in meta.items()))
+    header = f"{'endpoint':34} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'p50':>6} {'p95':>6} {'p99':>6}  vs {baseline['meta'].get('commit')}"
+    print(header)
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        line = (f"{name:34} {row['requests']:>6} {row['errors']:>4} {row['rps']:>8.1f} "
+                f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+        if baseline:
+            base = baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name)
+            if base:
+                line += " ".join(f" {change(row[key], base[key]):>5}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(line)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(report: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a saved load test report")
+    parser.add_argument("report")
+    parser.add_argument("--compare", help="baseline report to diff the percentiles against")
+    args = parser.parse_args()
+    print_report(load(args.report), load(args.compare) if args.compare else None)
+
+
+if __name__ == "__main__":
+    main()
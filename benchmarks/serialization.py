@@ -0,0 +1,97 @@
+# Serialization cost of the big listing responses, old path vs the precompiled one.
+#
+#   python -m benchmarks.serialization --sizes 1000 10000
+#
+# old: the handler builds a pydantic model per row, FastAPI validates the result against
+#      response_model again, serializes it and json.dumps it (JSONResponse)
+# new: router.serialization.page_response projects the rows onto the schema's fields and
+#      hands them to orjson, no per-row model and no second validation
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import delete, insert, select
+from database import BASE, engine, session_local
+from models.employee import Employee
+from models.session import SessionModel
+from router.employee import EmployeeResponse, employee_response_query
+from router.pagination import Page
+from router.serialization import page_response
+from router.session import SessionRead
+
+
+def seed(size: int):
+    with engine.begin() as conn:
+        conn.execute(delete(Employee))
+        conn.execute(delete(SessionModel))
+        conn.execute(insert(Employee), [
+            {"employee_id": f"E{i:07d}", "employee_name": f"Employee {i}", "designation": "Engineer",
+             "role": "Member", "manager_name": f"Employee {i // 10}"}
+            for i in range(size)
+        ])
+        start = date(2026, 1, 1)
+        conn.execute(insert(SessionModel), [
+            {"session_name": f"Session {i}", "start_date": start + timedelta(days=i % 365),
+             "end_date": start + timedelta(days=i % 365 + 30), "status": "Active"}
+            for i in range(size)
+        ])
+
+
+def old_path(response_type, build_items, rows) -> bytes:
+    field = create_model_field(name="Response", type_=response_type, mode="serialization")
+    content = {"items": build_items(rows), "next_cursor": None, "total": None}
+    serialized = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(serialized).body
+
+
+def new_path(model, rows) -> bytes:
+    return page_response(model, {"items": rows, "next_cursor": None, "total": None}).body
+
+
+def best_of(runs: int, fn, *args) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    BASE.metadata.create_all(engine)
+    print(f"{'endpoint':>12} {'rows':>7} {'old ms':>9} {'new ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        seed(size)
+        with session_local() as db:
+            employee_rows = db.execute(employee_response_query()).all()
+            sessions = db.scalars(select(SessionModel)).all()
+
+            cases = [
+                ("employees", EmployeeResponse, employee_rows,
+                 lambda rows: [EmployeeResponse(**row._mapping) for row in rows]),
+                ("sessions", SessionRead, sessions, lambda rows: rows),
+            ]
+            for name, model, rows, build_items in cases:
+                old = old_path(Page[model], build_items, rows)
+                new = new_path(model, rows)
+                assert json.loads(old) == json.loads(new), f"{name}: responses differ"
+                old_ms = best_of(args.runs, old_path, Page[model], build_items, rows)
+                new_ms = best_of(args.runs, new_path, model, rows)
+                print(f"{name:>12} {size:>7} {old_ms:>9.1f} {new_ms:>9.1f} {old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
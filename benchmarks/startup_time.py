@@ -0,0 +1,72 @@
+# Worker boot cost: wall time to import the app and the database work done while importing.
+#
+#   python -m benchmarks.startup_time --runs 10 --concurrency 16
+#
+# Each run starts fresh interpreters (concurrency of them at once, like a rolling restart)
+# that import main with connect/statement counters on both engines.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "startup_time.db"))
+
+HEAVY_MODULES = ["jose", "passlib", "pytz", "numpy", "email_validator"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import database
+from sqlalchemy import event
+counts = {"connects": 0, "statements": 0}
+for engine in (database.engine, database.async_engine.sync_engine):
+    event.listen(engine, "connect", lambda *a: counts.__setitem__("connects", counts["connects"] + 1))
+    event.listen(engine, "before_cursor_execute", lambda *a: counts.__setitem__("statements", counts["statements"] + 1))
+import main
+counts["seconds"] = time.perf_counter() - start
+counts["heavy_modules"] = [name for name in %r if name in sys.modules]
+print(json.dumps(counts))
+"""
+
+
+def boot(concurrency: int) -> list:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    children = [
+        subprocess.Popen([sys.executable, "-c", CHILD % HEAVY_MODULES], cwd=root,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(concurrency)
+    ]
+    results = []
+    for child in children:
+        out, _ = child.communicate()
+        if child.returncode != 0:
+            raise SystemExit("worker import failed")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time and boot-time database work")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        results.extend(boot(args.concurrency))
+    seconds = sorted(result["seconds"] for result in results)
+    print(f"{len(results)} boots in {time.perf_counter() - start:.1f}s (concurrency {args.concurrency})")
+    print(f"import main: p50 {statistics.median(seconds) * 1000:.0f} ms, "
+          f"max {seconds[-1] * 1000:.0f} ms")
+    print(f"database at import: {max(r['connects'] for r in results)} connections, "
+          f"{max(r['statements'] for r in results)} statements per worker")
+    print(f"heavy modules loaded at import: {results[-1]['heavy_modules'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
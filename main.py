@@ -1,14 +1,63 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from router import departments,manager,project,employee,performanceparameter,session,organization,sessionentry,performancerating
+from router import health,metrics,departments,manager,project,employee,employee_import,performanceparameter,session,organization,sessionentry,performancerating,rating_export
 from router.users import user,login
+from router.session_status import session_status_scheduler
+from router.response_cache import ResponseCacheMiddleware
+from router.metrics import MetricsMiddleware
+from router.query_budget import QueryBudgetMiddleware
+from router.tenancy import TenantMiddleware
+from router.etag import table_versions
+from router.read_routing import ReadRoutingMiddleware, replica_monitor
+from contextlib import asynccontextmanager
+from settings import settings
 
 
-app = FastAPI(title="Eagles")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.session_status_scheduler:
+        session_status_scheduler.start()
+    replica_monitor.start()
+    table_versions.start()
+    yield
+    await table_versions.stop()
+    await replica_monitor.stop()
+    await session_status_scheduler.stop()
 
 
+app = FastAPI(title="Eagles", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+
+# Tables each router writes to, a successful write under the prefix makes cached
+# responses and ETags tagged with them stale
+WRITE_TAGS = {
+    "/Departments": ("department",),
+    "/Manager": ("manager",),
+    "/Project": ("project",),
+    "/Employee": ("employee", "manager"),
+    "/PerformanceParameter": ("parameter",),
+    "/Session": ("session",),
+    "/Organization": ("organization",),
+    "/SessionEntry": ("rating",),
+    "/PerformanceRating": ("rating",),
+    "/User": ("user",),
+}
+
+# Innermost, so it only sees requests that reach the routes, cache hits never do
+if settings.query_budget != "off":
+    app.add_middleware(QueryBudgetMiddleware, mode=settings.query_budget)
+# Added before CORS so it runs inside it
+if settings.response_cache:
+    app.add_middleware(ResponseCacheMiddleware, write_tags=WRITE_TAGS)
+# Sets the request's tenant from its token, outside the response cache which varies on it
+app.add_middleware(TenantMiddleware)
+# Picks the primary or the replica for the request's reads, outside the response cache which
+# skips its entries for clients that just wrote
+if settings.replica_database_url:
+    app.add_middleware(ReadRoutingMiddleware)
 app.add_middleware(
    CORSMiddleware,
    allow_origins=["*"],
@@ -16,6 +65,20 @@ app.add_middleware(
    allow_methods=["*"],
    allow_headers=["*"],
 )
+
+# Added last so it is outermost and times cached responses and preflights too
+if settings.metrics:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(
+        metrics.router,
+        tags=["Metrics"]
+    )
+
+app.include_router(
+    health.router,
+    tags=["Health"],
+    prefix="/health"
+)
 app.include_router(
     login.router,
     tags=["Login"],
@@ -42,6 +105,11 @@ app.include_router(
     tags=["Employee"],
     prefix="/Employee"
 )
+app.include_router(
+    employee_import.router,
+    tags=["Employee"],
+    prefix="/Employee"
+)
 app.include_router(
     performanceparameter.router,
     tags=["PerformanceParameter"],
@@ -68,6 +136,11 @@ app.include_router(
     tags=["PerformanceRating"],
     prefix="/PerformanceRating"
 )
+app.include_router(
+    rating_export.router,
+    tags=["PerformanceRating"],
+    prefix="/PerformanceRating"
+)
 app.include_router(
     user.router,
     tags=["User"],
@@ -0,0 +1,108 @@
+# Versioned schema migrations, run once per deploy instead of on every worker boot:
+#
+#   python -m migrations            # apply pending migrations
+#   python -m migrations --status   # show the applied version
+#
+# Each migration runs in its own transaction and is recorded in tbl_schema_version.
+# Steps check for existing tables, columns and indexes, so a database created by the old
+# import-time create_all() upgrades cleanly.
+import importlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, insert, select
+from sqlalchemy.schema import AddConstraint, CreateColumn
+from sqlalchemy.engine import Connection, Engine
+
+MODEL_MODULES = [
+    "models.organization", "models.user", "models.departments", "models.project", "models.employee",
+    "models.manager", "models.session", "models.performanceparameter", "models.performancerating",
+    "models.sessionentry", "models.ratingrollup", "models.employeehierarchy", "models.replicaheartbeat",
+    "models.tableversion",
+]
+
+schema_version = Table(
+    "tbl_schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    def register(upgrade):
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        return upgrade
+    return register
+
+
+def load_models():
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+    from database import BASE
+    return BASE.metadata
+
+
+# Indexes on columns a later migration adds are left to that migration
+def create_missing_indexes(conn: Connection, metadata):
+    inspector = inspect(conn)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if all(column.name in columns for column in index.columns):
+                index.create(conn, checkfirst=True)
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(existing["name"] == column for existing in inspect(conn).get_columns(table))
+
+
+# Adds a model column to an existing table, with its foreign keys where ALTER TABLE supports them
+def add_column(conn: Connection, column):
+    table = column.table
+    if has_column(conn, table.name, column.name):
+        return
+    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+    if conn.dialect.name != "sqlite":
+        for foreign_key in column.foreign_keys:
+            conn.execute(AddConstraint(foreign_key.constraint))
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.scalar(select(func.max(schema_version.c.version))) or 0
+
+
+def run_migrations(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    from . import steps  # registers the migrations
+
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+        version = current_version(conn)
+
+    applied = []
+    for step in sorted(MIGRATIONS, key=lambda m: m.version):
+        if step.version <= version or (target is not None and step.version > target):
+            continue
+        with engine.begin() as conn:
+            step.upgrade(conn)
+            conn.execute(insert(schema_version).values(
+                version=step.version, description=step.description, applied_at=datetime.utcnow(),
+            ))
+        applied.append(step)
+    return applied
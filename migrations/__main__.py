@@ -0,0 +1,28 @@
+import argparse
+from database import engine
+from . import MIGRATIONS, current_version, run_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--status", action="store_true", help="print the applied version and exit")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args()
+
+    if args.status:
+        from . import steps  # noqa: F401
+        with engine.connect() as conn:
+            version = current_version(conn)
+        latest = max((m.version for m in MIGRATIONS), default=0)
+        print(f"schema version {version}, latest {latest}")
+        return
+
+    applied = run_migrations(engine, args.target)
+    for step in applied:
+        print(f"applied {step.version}: {step.description}")
+    if not applied:
+        print("schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
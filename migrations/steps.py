@@ -0,0 +1,178 @@
+import logging
+from sqlalchemy import bindparam, func, insert, select, update
+from database import BASE
+from . import add_column, create_missing_indexes, load_models, migration
+
+logger = logging.getLogger(__name__)
+
+
+@migration(1, "Create tables")
+def create_tables(conn):
+    load_models().create_all(conn, checkfirst=True)
+
+
+@migration(2, "Indexes on hot lookup columns")
+def hot_lookup_indexes(conn):
+    # create_all() skips existing tables, so indexes added to their models are created here
+    create_missing_indexes(conn, load_models())
+
+
+@migration(3, "Employee manager_id and hierarchy closure table")
+def employee_hierarchy(conn):
+    metadata = load_models()
+    from models.employee import Employee
+    from router.hierarchy import rebuild_hierarchy
+
+    add_column(conn, Employee.__table__.c.manager_id)
+    metadata.create_all(conn, checkfirst=True)
+    create_missing_indexes(conn, metadata)
+
+    # manager_name holds the manager's employee_name; the lowest emp_id wins on duplicate names
+    managers = {}
+    for emp_id, name in conn.execute(
+        select(Employee.emp_id, Employee.employee_name).where(Employee.role == "Manager").order_by(Employee.emp_id)
+    ):
+        managers.setdefault(name, emp_id)
+    links = [
+        {"row_id": emp_id, "row_manager_id": managers[manager_name]}
+        for emp_id, manager_name in conn.execute(
+            select(Employee.emp_id, Employee.manager_name).where(Employee.manager_name.isnot(None))
+        )
+        if manager_name in managers and managers[manager_name] != emp_id
+    ]
+    if links:
+        table = Employee.__table__
+        conn.execute(
+            update(table).where(table.c.emp_id == bindparam("row_id")).values(manager_id=bindparam("row_manager_id")),
+            links,
+        )
+    rebuild_hierarchy(conn)
+
+
+@migration(4, "Session (status, end_date) index and status refresh")
+def session_status_index(conn):
+    from router.session_status import refresh_session_statuses
+
+    create_missing_indexes(conn, load_models())
+    refresh_session_statuses(conn)
+
+
+@migration(5, "org_id on tenant tables, (org_id, ...) indexes and backfill")
+def tenant_columns(conn):
+    metadata = load_models()
+    from models.tenant import TenantScoped
+
+    tables = [mapper.local_table for mapper in BASE.registry.mappers if issubclass(mapper.class_, TenantScoped)]
+    for table in tables:
+        add_column(conn, table.c.org_id)
+    create_missing_indexes(conn, metadata)
+    backfill_tenants(conn)
+
+
+# Existing rows get the organization they can be traced to, when it is unambiguous: session
+# entries carry org_id with a session and an employee, reports follow their manager, ratings
+# their session or employee, and sessions, projects, departments and parameters the one
+# organization their ratings or employees belong to. With a single organization every row is
+# simply its. Rows left NULL belong to no tenant: requests can't see them, only scripts and
+# the scheduler, which run unscoped, so they are counted in a warning to be assigned by hand.
+# Parameters left NULL are the catalog every tenant shares.
+def backfill_tenants(conn):
+    from models.organization import Organization
+    from models.employee import Employee
+    from models.departments import Department
+    from models.project import Project
+    from models.session import SessionModel
+    from models.performanceparameter import PerformanceParameter
+    from models.performancerating import PerformanceRating
+    from models.sessionentry import SessionEntryModal
+
+    employee, department, project = Employee.__table__, Department.__table__, Project.__table__
+    session, parameter, rating = SessionModel.__table__, PerformanceParameter.__table__, PerformanceRating.__table__
+    entry = SessionEntryModal.__table__
+    tables = (employee, department, project, session, parameter, rating)
+
+    organizations = conn.scalars(select(Organization.org_id).limit(2)).all()
+    if len(organizations) == 1:
+        for table in tables:
+            conn.execute(update(table).where(table.c.org_id.is_(None)).values(org_id=organizations[0]))
+        return
+
+    def owner(org_column, *criteria):
+        return (
+            select(func.min(org_column)).where(org_column.isnot(None), *criteria)
+            .having(func.min(org_column) == func.max(org_column))
+            .scalar_subquery()
+        )
+
+    def fill(table, value):
+        conn.execute(update(table).where(table.c.org_id.is_(None)).values(org_id=value))
+
+    fill(session, owner(entry.c.org_id, entry.c.session_id == session.c.session_id))
+    fill(employee, owner(entry.c.org_id, entry.c.emp_id == employee.c.emp_id))
+
+    # Reports take their manager's organization, resolved here rather than with a self-referencing
+    # UPDATE, which MySQL rejects
+    rows = {emp_id: (manager_id, org_id) for emp_id, manager_id, org_id in conn.execute(
+        select(employee.c.emp_id, employee.c.manager_id, employee.c.org_id)
+    )}
+
+    resolved = {}
+
+    def org_of(emp_id):
+        chain = []
+        while emp_id in rows and emp_id not in resolved and emp_id not in chain:
+            manager_id, org_id = rows[emp_id]
+            if org_id is not None:
+                resolved[emp_id] = org_id
+                break
+            chain.append(emp_id)
+            emp_id = manager_id
+        org_id = resolved.get(emp_id)
+        for link in chain:
+            resolved[link] = org_id
+        return org_id
+
+    inherited = [
+        {"row_id": emp_id, "row_org_id": org_id}
+        for emp_id, (_, current) in rows.items()
+        if current is None and (org_id := org_of(emp_id)) is not None
+    ]
+    if inherited:
+        conn.execute(
+            update(employee).where(employee.c.emp_id == bindparam("row_id")).values(org_id=bindparam("row_org_id")),
+            inherited,
+        )
+
+    fill(rating, func.coalesce(
+        select(session.c.org_id).where(session.c.session_id == rating.c.session_id).scalar_subquery(),
+        select(employee.c.org_id).where(employee.c.emp_id == rating.c.emp_id).scalar_subquery(),
+    ))
+    fill(session, owner(rating.c.org_id, rating.c.session_id == session.c.session_id))
+    fill(parameter, owner(rating.c.org_id, rating.c.parameter_id == parameter.c.parameter_id))
+    fill(project, owner(employee.c.org_id, employee.c.project_id == project.c.project_id))
+    fill(department, func.coalesce(
+        owner(employee.c.org_id, employee.c.department_id == department.c.department_id),
+        owner(project.c.org_id, project.c.department_id == department.c.department_id),
+    ))
+
+    for table in (employee, department, project, session, rating):
+        orphaned = conn.scalar(select(func.count()).select_from(table).where(table.c.org_id.is_(None)))
+        if orphaned:
+            logger.warning(
+                "%s: %d rows could not be traced to one organization and were left without an org_id; "
+                "no tenant can see them until it is set", table.name, orphaned,
+            )
+
+
+@migration(6, "Replica heartbeat table")
+def replica_heartbeat(conn):
+    load_models().create_all(conn, checkfirst=True)
+    from models.replicaheartbeat import ReplicaHeartbeat
+
+    if conn.scalar(select(ReplicaHeartbeat.heartbeat_id)) is None:
+        conn.execute(insert(ReplicaHeartbeat).values(heartbeat_id=1, beat_ms=0))
+
+
+@migration(7, "Shared table versions for ETags and the response cache")
+def table_versions(conn):
+    load_models().create_all(conn, checkfirst=True)
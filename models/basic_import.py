@@ -1,4 +1,7 @@
 import sys
 sys.path.append("")
-from sqlalchemy import Column,String,Integer,Float,Date,ForeignKey,Boolean,Text, Enum,JSON,DateTime
+from sqlalchemy import Column,String,Integer,BigInteger,Float,Date,ForeignKey,Boolean,Text, Enum,JSON,DateTime
 from sqlalchemy.orm import relationship
+
+# BIGINT primary keys only autoincrement on SQLite when declared as INTEGER
+BigIntegerPK = BigInteger().with_variant(Integer, "sqlite")
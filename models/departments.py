@@ -2,13 +2,18 @@ import sys
 sys.path.append("..")
 from database import BASE
 from .basic_import import *
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, Index
+from .tenant import TenantScoped
 from sqlalchemy.orm import relationship
 
-class Department(BASE):
+class Department(TenantScoped, BASE):
     __tablename__="tbl_department"
+    __table_args__ = (
+        Index("ix_tbl_department_org_department", "org_id", "department_id"),
+        Index("ix_tbl_department_org_name", "org_id", "department_name"),
+    )
     department_id = Column(Integer, primary_key=True, autoincrement=True)  
-    department_name = Column(String(100), nullable=False) 
+    department_name = Column(String(100), nullable=False, index=True)
 
     employees = relationship("Employee", back_populates="department", cascade="all, delete")
     projects = relationship("Project", back_populates="department", cascade="all, delete")
\ No newline at end of file
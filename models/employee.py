@@ -2,23 +2,32 @@ import sys
 sys.path.append("..")
 from database import BASE
 from .basic_import import *
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, Index
+from .tenant import TenantScoped
 from sqlalchemy.orm import relationship
  
-class Employee(BASE):
+class Employee(TenantScoped, BASE):
     __tablename__ = "tbl_employee"
+    __table_args__ = (
+        # Tenant listings page by emp_id, the manager lookups filter on role
+        Index("ix_tbl_employee_org_emp", "org_id", "emp_id"),
+        Index("ix_tbl_employee_org_role", "org_id", "role"),
+    )
  
-    emp_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    emp_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     employee_id = Column(String(50), nullable=False, unique=True)  # New field
     employee_name = Column(String(100), nullable=False)
     designation = Column(String(100), nullable=False)
-    role = Column(String(50), nullable=False)  # Role can be 'Member', 'Manager', 'HR Admin'
+    role = Column(String(50), nullable=False, index=True)  # Role can be 'Member', 'Manager', 'HR Admin'
      # Add manager_name column
-    manager_name = Column(String(100), nullable=True)  # Specify length for VARCHAR
+    manager_name = Column(String(100), nullable=True, index=True)  # Specify length for VARCHAR
     department_id = Column(Integer, ForeignKey('tbl_department.department_id', ondelete="CASCADE"), nullable=True)
     project_id = Column(Integer, ForeignKey('tbl_project.project_id', ondelete="CASCADE"), nullable=True)
+    # Reporting line, kept in step with manager_name; tbl_employee_hierarchy holds its transitive closure
+    manager_id = Column(BigInteger, ForeignKey('tbl_employee.emp_id', ondelete="SET NULL"), nullable=True, index=True)
  
     # Relationships
     department = relationship("Department", back_populates="employees")
     project = relationship("Project", back_populates="employees")
+    manager = relationship("Employee", remote_side=[emp_id])
     
\ No newline at end of file
@@ -0,0 +1,16 @@
+from database import BASE
+from .basic_import import *
+from sqlalchemy import Column, BigInteger, Integer, ForeignKey, Index
+
+
+# Closure table of the manager hierarchy: one row per (ancestor, descendant) pair including
+# each employee with itself at depth 0, so a whole subtree is one indexed range read
+class EmployeeHierarchy(BASE):
+    __tablename__ = "tbl_employee_hierarchy"
+    __table_args__ = (
+        Index("ix_tbl_employee_hierarchy_descendant", "descendant_id"),
+    )
+
+    ancestor_id = Column(BigInteger, ForeignKey('tbl_employee.emp_id', ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    descendant_id = Column(BigInteger, ForeignKey('tbl_employee.emp_id', ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    depth = Column(Integer, nullable=False)
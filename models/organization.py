@@ -8,7 +8,7 @@ from sqlalchemy.orm import relationship
 
 class Organization(BASE):
     __tablename__ = "tbl_organization"
-    org_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    org_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     org_name = Column(String(1000), nullable=False)
     org_email = Column(String(255), unique=True, nullable=False)   
     org_mobile_number = Column(String(15), nullable=False) 
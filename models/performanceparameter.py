@@ -2,11 +2,17 @@ import sys
 sys.path.append("..")
 from database import BASE
 from .basic_import import *
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, Index
+from .tenant import TenantScoped
 from sqlalchemy.orm import relationship
 
-class PerformanceParameter(BASE):
+class PerformanceParameter(TenantScoped, BASE):
     __tablename__ = "tbl_performanceparameter"
+    # Parameters without an organization are the shared default set
+    tenant_shared = True
+    __table_args__ = (
+        Index("ix_tbl_performanceparameter_org_parameter", "org_id", "parameter_id"),
+    )
     parameter_id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
     min_rating = Column(Integer, nullable=False)
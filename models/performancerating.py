@@ -1,9 +1,15 @@
 from database import BASE
-from sqlalchemy import Column, ForeignKey, Integer, String,BigInteger
+from sqlalchemy import Column, ForeignKey, Index, Integer, String,BigInteger
 from sqlalchemy.orm import relationship
+from .tenant import TenantScoped
 
-class PerformanceRating(BASE):
+class PerformanceRating(TenantScoped, BASE):
     __tablename__ = "tbl_performance_rating"
+    __table_args__ = (
+        # Ratings are read by session and by (session, employee); the prefix also serves session_id alone
+        Index("ix_tbl_performance_rating_session_emp", "session_id", "emp_id"),
+        Index("ix_tbl_performance_rating_org_session_emp", "org_id", "session_id", "emp_id"),
+    )
 
     rating_id = Column(Integer, primary_key=True, autoincrement=True)
     emp_id = Column(BigInteger, ForeignKey('tbl_employee.emp_id'), nullable=False)
@@ -2,13 +2,18 @@ import sys
 sys.path.append("..")
 from database import BASE
 from .basic_import import *
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, Index
+from .tenant import TenantScoped
 from sqlalchemy.orm import relationship,joinedload 
 
-class Project(BASE):
+class Project(TenantScoped, BASE):
     __tablename__="tbl_project"
+    __table_args__ = (
+        Index("ix_tbl_project_org_project", "org_id", "project_id"),
+        Index("ix_tbl_project_org_name", "org_id", "project_name"),
+    )
     project_id = Column(Integer, primary_key=True, autoincrement=True)  
-    project_name = Column(String(100), nullable=False) 
+    project_name = Column(String(100), nullable=False, index=True)
     department_id = Column(Integer, ForeignKey('tbl_department.department_id',ondelete="CASCADE"),nullable=False)
     
     department = relationship("Department", back_populates="projects")  # Ensure you define this relationship if needed
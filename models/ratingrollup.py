@@ -0,0 +1,31 @@
+from database import BASE
+from .basic_import import *
+from sqlalchemy import Column, BigInteger, Integer
+
+
+# count / sum / sum of squares / min / max of the ratings in one group, enough for
+# mean and standard deviation without touching tbl_performance_rating
+class RatingRollupColumns:
+    rating_count = Column(BigInteger, nullable=False, default=0)
+    rating_sum = Column(BigInteger, nullable=False, default=0)
+    rating_sum_sq = Column(BigInteger, nullable=False, default=0)
+    rating_min = Column(Integer, nullable=True)
+    rating_max = Column(Integer, nullable=True)
+
+
+class RatingRollupEmployee(RatingRollupColumns, BASE):
+    __tablename__ = "tbl_rating_rollup_employee"
+    session_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    emp_id = Column(BigInteger, primary_key=True, autoincrement=False)
+
+
+class RatingRollupParameter(RatingRollupColumns, BASE):
+    __tablename__ = "tbl_rating_rollup_parameter"
+    session_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    parameter_id = Column(Integer, primary_key=True, autoincrement=False)
+
+
+class RatingRollupDepartment(RatingRollupColumns, BASE):
+    __tablename__ = "tbl_rating_rollup_department"
+    session_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    department_id = Column(Integer, primary_key=True, autoincrement=False)  # 0 for employees without a department
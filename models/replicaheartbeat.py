@@ -0,0 +1,10 @@
+from database import BASE
+from sqlalchemy import Column, BigInteger, Integer
+
+
+# One row the primary's workers stamp every replica_check_seconds; how far the replica's copy
+# trails the primary's is the replication lag (router/read_routing.py)
+class ReplicaHeartbeat(BASE):
+    __tablename__ = "tbl_replica_heartbeat"
+    heartbeat_id = Column(Integer, primary_key=True, autoincrement=False)
+    beat_ms = Column(BigInteger, nullable=False)  # epoch milliseconds
@@ -2,12 +2,20 @@ import sys
 sys.path.append("..")
 from database import BASE
 from .basic_import import *
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, Index
+from .tenant import TenantScoped
 from sqlalchemy.orm import relationship
 
-class SessionModel(BASE):
+class SessionModel(TenantScoped, BASE):
     __tablename__="tbl_session"
-    session_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    __table_args__ = (
+        # "Active sessions", "sessions closing before X": status equality then an end_date range
+        Index("ix_tbl_session_status_end_date", "status", "end_date"),
+        # The same per tenant, and the tenant's session listing
+        Index("ix_tbl_session_org_status_end_date", "org_id", "status", "end_date"),
+        Index("ix_tbl_session_org_session", "org_id", "session_id"),
+    )
+    session_id = Column(BigIntegerPK, primary_key=True, autoincrement=True)
     session_name = Column(String(255), nullable=False)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
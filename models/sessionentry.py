@@ -1,10 +1,13 @@
 from database import BASE
 from .basic_import import *
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 class SessionEntryModal(BASE):
     __tablename__ = "tbl_sessionentry"
+    __table_args__ = (
+        Index("ix_tbl_sessionentry_session_emp", "session_id", "emp_id"),
+    )
     sessionentry_id = Column(Integer, primary_key=True, autoincrement=True)  
     session_id = Column(BigInteger, ForeignKey('tbl_session.session_id', ondelete="CASCADE"), nullable=True)  # Change to BigInteger
     emp_id = Column(BigInteger, ForeignKey('tbl_employee.emp_id', ondelete="CASCADE"), nullable=True)
@@ -0,0 +1,10 @@
+from database import BASE
+from sqlalchemy import Column, BigInteger, String
+
+
+# Write counter per cached table, shared by every worker: ETags and cached responses are
+# tagged with these versions (router/etag.py)
+class TableVersion(BASE):
+    __tablename__ = "tbl_table_version"
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, ForeignKey
+from sqlalchemy.orm import declared_attr
+
+
+# Owning organization of a row. Queries on these models are filtered to the request's tenant
+# and new rows get its org_id (router/tenancy.py); (org_id, ...) indexes are declared per model.
+class TenantScoped:
+    # True when rows without an org_id are a shared catalog every tenant sees
+    tenant_shared = False
+
+    @declared_attr
+    def org_id(cls):
+        return Column(BigInteger, ForeignKey("tbl_organization.org_id", ondelete="CASCADE"), nullable=True)
@@ -6,11 +6,11 @@ from sqlalchemy import Column, BigInteger, String, Date, ForeignKey
 from sqlalchemy.orm import relationship
 class Users(BASE):
     __tablename__ = "tbl_users"
-    user_id = Column(BigInteger,primary_key=True,autoincrement=True)
-    org_id = Column(BigInteger,ForeignKey("tbl_organization.org_id",ondelete="SET NULL"))
+    user_id = Column(BigIntegerPK,primary_key=True,autoincrement=True)
+    org_id = Column(BigInteger,ForeignKey("tbl_organization.org_id",ondelete="SET NULL"),index=True)
     role = Column(String(255))
     user_name = Column(String(255))
-    user_email= Column(String(255))
+    user_email= Column(String(255),index=True)
     user_mobile = Column(String(10))
     user_password = Column(String(255))
     user_dp = Column(String(255))
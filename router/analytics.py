@@ -0,0 +1,46 @@
+from typing import Dict
+
+
+# Per-group distribution statistics over integer ratings, vectorised across all groups:
+# ratings are sorted once by (group, rating) so every group's quantiles are index lookups.
+# numpy is imported on first use, only the analytics endpoint needs it
+def grouped_rating_stats(groups: "np.ndarray", ratings: "np.ndarray") -> Dict[int, dict]:
+    import numpy as np
+    if len(ratings) == 0:
+        return {}
+    keys, inverse = np.unique(groups, return_inverse=True)
+    order = np.lexsort((ratings, inverse))
+    sorted_ratings = ratings[order].astype(np.float64)
+    counts = np.bincount(inverse, minlength=len(keys))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    means = np.add.reduceat(sorted_ratings, starts) / counts
+    variances = np.add.reduceat(sorted_ratings * sorted_ratings, starts) / counts - means * means
+    stds = np.sqrt(np.maximum(variances, 0.0))
+
+    def quantile(q: float) -> np.ndarray:
+        position = starts + q * (counts - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        return sorted_ratings[low] + (sorted_ratings[high] - sorted_ratings[low]) * (position - low)
+
+    medians, p10s, p90s = quantile(0.5), quantile(0.1), quantile(0.9)
+
+    low_rating = int(ratings.min())
+    values = np.arange(low_rating, int(ratings.max()) + 1)
+    histograms = np.zeros((len(keys), len(values)), dtype=np.int64)
+    np.add.at(histograms, (inverse, ratings - low_rating), 1)
+
+    stats = {}
+    for index, key in enumerate(keys.tolist()):
+        histogram = histograms[index]
+        stats[key] = {
+            "count": int(counts[index]),
+            "mean": round(float(means[index]), 4),
+            "median": round(float(medians[index]), 4),
+            "p10": round(float(p10s[index]), 4),
+            "p90": round(float(p90s[index]), 4),
+            "std": round(float(stds[index]), 4),
+            "histogram": {int(value): int(n) for value, n in zip(values, histogram) if n},
+        }
+    return stats
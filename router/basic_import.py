@@ -4,11 +4,12 @@ from fastapi.routing import APIRouter
 from fastapi.exceptions import HTTPException
 from pydantic import BaseModel,Field
 from fastapi.encoders import jsonable_encoder
+from .serialization import json_response
 from .users.login import get_current_user
 from datetime import datetime
 from enum import Enum
 from fastapi import APIRouter,status,Depends
-from pytz import timezone
+from sqlalchemy import select
 router=APIRouter()
 
 def send_message(msg,data=None):
@@ -19,20 +20,22 @@ def raise_exception(status_code:int=None,detail:str=None):
 
 
 async def check_instance(model=None,field_name:str=None,field_value=None,db=None):
-    try:
-        instance = db.query(model).filter(getattr(model, field_name) == field_value,model.is_deleted==False).first()
-    except Exception as e:
-        instance = db.query(model).filter(getattr(model, field_name) == field_value).first()
+    stmt = select(model).filter(getattr(model, field_name) == field_value)
+    if hasattr(model, "is_deleted"):
+        stmt = stmt.filter(model.is_deleted==False)
+    instance = (await db.execute(stmt)).scalars().first()
     if instance is not None:
         return instance
     return None
 
 
+# Returned as a response directly, so FastAPI doesn't run jsonable_encoder over it again
 def succes_response(data=None,msg=None):
-    return {"status_code":200,"msg":msg,"response":jsonable_encoder(data)}
+    return json_response({"status_code":200,"msg":msg,"response":data})
 
 
 async def get_current_ist_time():
+    from pytz import timezone  # only needed on the few writes that stamp a time
     ist_timezone = timezone("Asia/Kolkata")
     current_time = datetime.now(ist_timezone)
     return current_time
@@ -43,12 +46,18 @@ class Role(str, Enum):
     hr_admin = "HR Admin"
 
 def is_authenticated(*allowed_roles):
+    # Roles normalised once here, the principal comes from the cache so the check costs no query
+    allow_all = "*" in allowed_roles
+    allowed = {getattr(role, "value", role).lower() for role in allowed_roles}
+
     def wrapper(current_user = Depends(get_current_user)):
-        target_outlet_id = 0
         if not current_user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-        if allowed_roles[0] != "*" and current_user.role.capitalize() not in allowed_roles:
+        if not allow_all and (current_user.role or "").lower() not in allowed:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not authorized to perform this action!")
+        return current_user
+
+    return wrapper
 
  
\ No newline at end of file
@@ -1,16 +1,20 @@
-from database import engine, connect_db, db_dependency
+from database import connect_db, async_db_dependency
+from .pagination import Page, pagination_dependency, apaginate
+from .serialization import page_response, rows_response, serialize
+from .etag import ConditionalGet, table_versions, with_etag
+from .reference_cache import reference_cache
+from .hierarchy import remove_employees
 from models.departments import Department
 from models.employee import Employee
 from models.project import Project
 from .basic_import import *
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List
 router = APIRouter()
 
-Department.metadata.create_all(bind=engine)
 
 class DepartmentCreate(BaseModel):
     department_name: str
@@ -28,64 +32,143 @@ class DepartmentUpdate(BaseModel):
     class Config:
         orm_mode = True
 
+class DepartmentSummary(BaseModel):
+    department_id: int
+    department_name: str
+    total_projects: int
+    total_employees: int
+
+class ProjectHeadcount(BaseModel):
+    project_id: int
+    project_name: str
+    headcount: int
+
+class DepartmentTree(BaseModel):
+    department_id: int
+    department_name: str
+    total_employees: int
+    projects: List[ProjectHeadcount] = []
+
+
+# Correlated counts, so a department's projects and employees are counted in SQL, never loaded
+def department_project_count():
+    return (
+        select(func.count(Project.project_id))
+        .where(Project.department_id == Department.department_id)
+        .correlate(Department)
+        .scalar_subquery()
+    )
+
+def department_employee_count():
+    return (
+        select(func.count(Employee.emp_id))
+        .where(Employee.department_id == Department.department_id)
+        .correlate(Department)
+        .scalar_subquery()
+    )
+
 
 
 # POST operation: Create a new department
 @router.post("/departments/", response_model=DepartmentResponse)
-async def create_department(department_data: DepartmentCreate, db: db_dependency):
+async def create_department(department_data: DepartmentCreate, db: async_db_dependency):
     new_department = Department(department_name=department_data.department_name)
     
     db.add(new_department)
-    db.commit()
-    db.refresh(new_department)
+    await db.commit()
+    await reference_cache.ainvalidate("department")
+    await db.refresh(new_department)
     return new_department
 
 
 
 # DELETE operation: Delete a department by ID
 @router.delete("/departments/{department_id}")
-async def delete_department(department_id: int, db: db_dependency):
-    department = db.query(Department).filter(Department.department_id == department_id).first()
+async def delete_department(department_id: int, db: async_db_dependency):
+    # Load the cascaded collections up front, they can't be lazy loaded on an AsyncSession
+    result = await db.execute(
+        select(Department)
+        .options(selectinload(Department.employees), selectinload(Department.projects))
+        .filter(Department.department_id == department_id)
+    )
+    department = result.scalars().first()
     if department is None:
         raise HTTPException(status_code=404, detail="Department not found")
     
-    # Deleting the department will automatically delete related employees and projects due to the cascade setting
-    db.delete(department)
-    db.commit()
+    # Deleting the department will automatically delete related employees and projects due to the cascade setting,
+    # their reports elsewhere lose their manager and the hierarchy is relinked first
+    emp_ids = [employee.emp_id for employee in department.employees]
+    await db.run_sync(lambda session: remove_employees(session.connection(), emp_ids))
+    await db.delete(department)
+    await db.commit()
+    await reference_cache.ainvalidate("department", "project", "manager")
+    await table_versions.abump("employee")
     return {"message": f"Department with ID {department_id} has been deleted successfully"}
 
 # PATCH operation: Update a department name by ID
 @router.patch("/departments/{department_id}", response_model=DepartmentResponse)
-async def update_department(department_id: int, department_data: DepartmentUpdate, db: db_dependency):
-    department = db.query(Department).filter(Department.department_id == department_id).first()
+async def update_department(department_id: int, department_data: DepartmentUpdate, db: async_db_dependency):
+    result = await db.execute(select(Department).filter(Department.department_id == department_id))
+    department = result.scalars().first()
     if department is None:
         raise HTTPException(status_code=404, detail="Department not found")
     
     department.department_name = department_data.department_name
-    db.commit()
-    db.refresh(department)
+    await db.commit()
+    await reference_cache.ainvalidate("department")
+    await db.refresh(department)
     return department
 
-@router.get("/departments/", response_model=List[DepartmentResponse])
-async def get_departments(db: db_dependency):
-    departments = db.query(Department).all()
-    return departments
-
-
-@router.get("/departments")
-def get_departments(db: db_dependency):
-    departments = db.query(Department).all()
-    result = []
-    
-    for department in departments:
-        total_projects = len(department.projects)
-        total_employees = len(department.employees)
-        
-        result.append({
-            "department_id": department.department_id,
-            "department_name": department.department_name,
-            "total_projects": total_projects,
-            "total_employees": total_employees
-        })
-    
-    return result
\ No newline at end of file
+@router.get("/departments/", response_model=Page[DepartmentResponse])
+async def get_departments(
+    db: async_db_dependency,
+    page: pagination_dependency,
+    etag: Optional[str] = Depends(ConditionalGet("department")),
+):
+    return with_etag(page_response(DepartmentResponse, await apaginate(db, select(Department), [Department.department_id], page)), etag)
+
+
+@router.get("/departments", response_model=List[DepartmentSummary])
+async def get_department_summaries(db: async_db_dependency):
+    result = await db.execute(
+        select(
+            Department.department_id,
+            Department.department_name,
+            department_project_count().label("total_projects"),
+            department_employee_count().label("total_employees"),
+        ).order_by(Department.department_id)
+    )
+    return rows_response(DepartmentSummary, result.all())
+
+
+# Department -> project -> headcount from one grouped statement
+@router.get("/departments/tree", response_model=List[DepartmentTree])
+async def get_department_tree(db: async_db_dependency):
+    result = await db.execute(
+        select(
+            Department.department_id,
+            Department.department_name,
+            department_employee_count().label("total_employees"),
+            Project.project_id,
+            Project.project_name,
+            func.count(Employee.emp_id).label("headcount"),
+        )
+        .outerjoin(Project, Project.department_id == Department.department_id)
+        .outerjoin(Employee, Employee.project_id == Project.project_id)
+        .group_by(Department.department_id, Department.department_name, Project.project_id, Project.project_name)
+        .order_by(Department.department_id, Project.project_id)
+    )
+    tree = {}
+    for row in result.all():
+        department = tree.get(row.department_id)
+        if department is None:
+            department = tree[row.department_id] = DepartmentTree(
+                department_id=row.department_id,
+                department_name=row.department_name,
+                total_employees=row.total_employees,
+            )
+        if row.project_id is not None:
+            department.projects.append(
+                ProjectHeadcount(project_id=row.project_id, project_name=row.project_name, headcount=row.headcount)
+            )
+    return serialize(List[DepartmentTree], list(tree.values()))
\ No newline at end of file
@@ -1,9 +1,18 @@
-from database import engine, db_dependency
+from database import db_dependency
+from .pagination import Page, pagination_dependency, paginate
+from .serialization import page_response, rows_response
+from .reference_cache import reference_cache
+from .etag import table_versions
+from .response_cache import cache_response
+from .query_budget import query_budget
+from .hierarchy import add_employees, move_employee, remove_employee
 from models.employee import Employee
+from models.employeehierarchy import EmployeeHierarchy
 from models.project import Project
 from models.departments import Department
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import func, select
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from enum import Enum
@@ -13,9 +22,6 @@ router = APIRouter(
     tags=["employees"]
 )
 
-# Ensure the Employee table is created
-Employee.metadata.create_all(bind=engine)
-
 # Enum for role types
 class RoleEnum(str, Enum):
     member = "Member"
@@ -44,6 +50,10 @@ class EmployeeResponse(BaseModel):
     manager_name: Optional[str] = None
     department_name: Optional[str] = None
 
+class EmployeeReport(EmployeeResponse):
+    manager_id: Optional[int] = None
+    depth: int
+
 class ManagerResponse(BaseModel):
     employee_name: str    
 
@@ -51,20 +61,60 @@ class ManagerResponse(BaseModel):
         orm_mode = True
 
 # Helper functions
+# One statement projecting exactly the EmployeeResponse columns, so reads never
+# go back to the DB per row for the project or department name
+def employee_response_query():
+    return (
+        select(
+            Employee.employee_id,
+            Employee.emp_id,
+            Employee.employee_name,
+            Employee.designation,
+            Project.project_name,
+            Employee.role,
+            Employee.manager_name,
+            Department.department_name,
+        )
+        .outerjoin(Project, Employee.project_id == Project.project_id)
+        .outerjoin(Department, Employee.department_id == Department.department_id)
+    )
+
+def fetch_employee_response(db: Session, emp_id: int):
+    row = db.execute(employee_response_query().filter(Employee.emp_id == emp_id)).first()
+    return EmployeeResponse(**row._mapping) if row else None
+
 def validate_project_name(db: Session, project_name: str):
-    project = db.query(Project).filter(Project.project_name == project_name).first()
+    project = reference_cache.get(db, "project").row_for_name(project_name)
     if not project:
         raise HTTPException(status_code=400, detail="Project does not exist")
+    return project
 
 def validate_manager_name(db: Session, role: RoleEnum, manager_name: Optional[str]):
     if role in [RoleEnum.hr_admin, RoleEnum.manager]:
         return True
     elif role == RoleEnum.member:
-        managers = db.query(Employee).filter(Employee.role == RoleEnum.manager).all()
-        manager_names = [manager.employee_name for manager in managers]
-        if manager_name not in manager_names:
+        if manager_name not in reference_cache.get(db, "manager").by_name:
             raise HTTPException(status_code=400, detail="Member must have a Manager as manager name")
 
+# The employee a manager_name refers to: the first Manager by that name, else the first employee.
+# Managers and HR admins may name any employee as their manager, not only Manager-role ones.
+def manager_id_expression(manager_name: str):
+    by_name = select(func.min(Employee.emp_id)).where(Employee.employee_name == manager_name)
+    return func.coalesce(
+        by_name.where(Employee.role == RoleEnum.manager.value).scalar_subquery(),
+        by_name.scalar_subquery(),
+    )
+
+def manager_id_for(db: Session, manager_name: Optional[str]) -> Optional[int]:
+    return db.scalar(select(manager_id_expression(manager_name))) if manager_name else None
+
+# After any employee write: listings that count employees change, the manager cache only
+# when a manager is involved
+def employees_changed(*roles):
+    table_versions.bump("employee")
+    if RoleEnum.manager in roles:
+        reference_cache.invalidate("manager")
+
 # Create employee schema
 class EmployeeCreate(BaseModel):
     employee_id: str
@@ -78,7 +128,8 @@ class EmployeeCreate(BaseModel):
 # Create a new employee
 @router.post("/", response_model=EmployeeResponse)
 def create_employee(employee: EmployeeCreate, db: db_dependency):
-    if db.query(Employee).filter(Employee.employee_id == employee.employee_id).first():
+    # employee_id is unique across tenants, so the duplicate check looks at every tenant
+    if db.query(Employee).filter(Employee.employee_id == employee.employee_id).execution_options(all_tenants=True).first():
         raise HTTPException(status_code=400, detail="Employee with this ID already exists")
 
     if employee.manager_name:
@@ -86,17 +137,15 @@ def create_employee(employee: EmployeeCreate, db: db_dependency):
 
     project_id = None
     if employee.project_name:
-        project = db.query(Project).filter(Project.project_name == employee.project_name).first()
-        if not project:
+        project_id = reference_cache.get(db, "project").id_for(employee.project_name)
+        if project_id is None:
             raise HTTPException(status_code=400, detail="Project not found")
-        project_id = project.project_id
 
     department_id = None
     if employee.department_name:
-        department = db.query(Department).filter(Department.department_name == employee.department_name).first()
-        if not department:
+        department_id = reference_cache.get(db, "department").id_for(employee.department_name)
+        if department_id is None:
             raise HTTPException(status_code=400, detail="Department does not exist")
-        department_id = department.department_id
 
     new_employee = Employee(
         employee_id=employee.employee_id,
@@ -105,12 +154,16 @@ def create_employee(employee: EmployeeCreate, db: db_dependency):
         role=employee.role,
         department_id=department_id,
         project_id=project_id,
-        manager_name=employee.manager_name
+        manager_name=employee.manager_name,
+        manager_id=manager_id_for(db, employee.manager_name),
     )
 
     db.add(new_employee)
+    db.flush()
+    add_employees(db.connection(), [(new_employee.emp_id, new_employee.manager_id)])
     db.commit()
     db.refresh(new_employee)
+    employees_changed(employee.role)
 
     return EmployeeResponse(
         employee_id=new_employee.employee_id,
@@ -126,27 +179,10 @@ def create_employee(employee: EmployeeCreate, db: db_dependency):
 # Get employee by emp_id
 @router.get("/{emp_id}", response_model=EmployeeResponse)
 def get_employee(emp_id: int, db: db_dependency):
-    employee = db.query(Employee).filter(Employee.emp_id == emp_id).first()
+    employee = fetch_employee_response(db, emp_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-
-    project_name = None
-    if employee.project_id:
-        project = db.query(Project).filter(Project.project_id == employee.project_id).first()
-        project_name = project.project_name if project else None
-
-    department_name = employee.department.department_name if employee.department else None
-
-    return EmployeeResponse(
-        employee_id=employee.employee_id,
-        emp_id=employee.emp_id,
-        employee_name=employee.employee_name,
-        designation=employee.designation,
-        project_name=project_name,
-        role=employee.role,
-        manager_name=employee.manager_name,
-        department_name=department_name
-    )
+    return employee
 
 # Update employee
 @router.patch("/{emp_id}", response_model=EmployeeResponse)
@@ -154,15 +190,14 @@ def update_employee(emp_id: int, employee_update: EmployeeUpdate, db: db_depende
     employee = db.query(Employee).filter(Employee.emp_id == emp_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
+    previous_role = employee.role
 
     if employee_update.manager_name and employee_update.role:
         validate_manager_name(db, employee_update.role, employee_update.manager_name)
 
     project_id = None
     if employee_update.project_name:
-        validate_project_name(db, employee_update.project_name)
-        project = db.query(Project).filter(Project.project_name == employee_update.project_name).first()
-        project_id = project.project_id
+        project_id = validate_project_name(db, employee_update.project_name).project_id
 
     if employee_update.employee_name:
         employee.employee_name = employee_update.employee_name
@@ -174,26 +209,15 @@ def update_employee(emp_id: int, employee_update: EmployeeUpdate, db: db_depende
         employee.project_id = project_id
     if employee_update.manager_name:
         employee.manager_name = employee_update.manager_name
+        manager_id = manager_id_for(db, employee_update.manager_name)
+        if manager_id != employee.manager_id:
+            move_employee(db.connection(), emp_id, manager_id)
+            employee.manager_id = manager_id
 
     db.commit()
-    db.refresh(employee)
+    employees_changed(previous_role, employee_update.role)
 
-    # Get updated project name for response
-    updated_project_name = None
-    if employee.project_id:
-        project = db.query(Project).filter(Project.project_id == employee.project_id).first()
-        updated_project_name = project.project_name if project else None
-
-    return EmployeeResponse(
-        employee_id=employee.employee_id,
-        emp_id=employee.emp_id,
-        employee_name=employee.employee_name,
-        designation=employee.designation,
-        project_name=updated_project_name,
-        role=employee.role,
-        manager_name=employee.manager_name,
-        department_name=employee.department.department_name if employee.department else None
-    )
+    return fetch_employee_response(db, emp_id)
 
 # Delete employee
 @router.delete("/{emp_id}")
@@ -202,36 +226,38 @@ def delete_employee(emp_id: int, db: db_dependency):
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
+    remove_employee(db.connection(), emp_id)
     db.delete(employee)
     db.commit()
+    employees_changed(employee.role)
     return {"message": f"Employee with ID {emp_id} deleted successfully"}
 
 # Get all employees
-@router.get("/", response_model=List[EmployeeResponse])
-def get_all_employees(db: db_dependency):
-    employees = db.query(Employee).all()
-
-    employee_responses = []
-    for employee in employees:
-        project_name = None
-        if employee.project_id:
-            project = db.query(Project).filter(Project.project_id == employee.project_id).first()
-            project_name = project.project_name if project else None
-
-        department_name = employee.department.department_name if employee.department else None
-
-        employee_responses.append(EmployeeResponse(
-            employee_id=employee.employee_id,
-            emp_id=employee.emp_id,
-            employee_name=employee.employee_name,
-            designation=employee.designation,
-            project_name=project_name,
-            role=employee.role,
-            manager_name=employee.manager_name,
-            department_name=department_name
-        ))
-
-    return employee_responses
+@router.get("/", response_model=Page[EmployeeResponse])
+@query_budget(2)
+@cache_response(ttl=60, tags=("employee", "project", "department"))
+def get_all_employees(db: db_dependency, page: pagination_dependency):
+    return page_response(EmployeeResponse, paginate(db, employee_response_query(), [Employee.emp_id], page))
+
+# Everyone under an employee, direct reports at depth 1, down to `depth` levels or the whole
+# subtree; a single range read on the hierarchy closure table
+@router.get("/{emp_id}/reports", response_model=List[EmployeeReport])
+@query_budget(3)
+@cache_response(ttl=60, tags=("employee", "project", "department"))
+def get_reports(emp_id: int, db: db_dependency, depth: Optional[int] = Query(None, ge=1)):
+    stmt = (
+        employee_response_query()
+        .add_columns(Employee.manager_id, EmployeeHierarchy.depth)
+        .join(EmployeeHierarchy, EmployeeHierarchy.descendant_id == Employee.emp_id)
+        .where(EmployeeHierarchy.ancestor_id == emp_id, EmployeeHierarchy.depth >= 1)
+        .order_by(EmployeeHierarchy.depth, Employee.emp_id)
+    )
+    if depth is not None:
+        stmt = stmt.where(EmployeeHierarchy.depth <= depth)
+    rows = db.execute(stmt).all()
+    if not rows and db.get(Employee, emp_id) is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return rows_response(EmployeeReport, rows)
 
 # Get all managers
 @router.get("/managers/", response_model=List[ManagerResponse])
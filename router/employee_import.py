@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+from database import db_dependency
+from models.employee import Employee
+from .employee import EmployeeCreate, RoleEnum
+from .reference_cache import reference_cache
+from .etag import table_versions
+from .hierarchy import add_employees
+from .query_budget import query_budget
+from .tenancy import with_tenant
+
+router = APIRouter(
+    prefix="/employees",
+    tags=["employees"]
+)
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_BATCH_SIZE = 5000
+IN_LIST_SIZE = 1000  # ids per IN (...), well under SQLite's bound parameter limit
+MAX_REPORTED_ERRORS = 1000
+PARSE_ERRORS = (csv.Error, json.JSONDecodeError, UnicodeDecodeError)
+IMPORT_FIELDS = ["employee_id", "employee_name", "designation", "role", "project_name", "manager_name", "department_name"]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    employee_id: Optional[str] = None
+    error: str
+
+class ImportResult(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    # Set when the file stops parsing: every row before it was imported, the rest was not read
+    parse_error: Optional[ImportRowError] = None
+
+
+def in_chunks(values: list) -> Iterator[list]:
+    for start in range(0, len(values), IN_LIST_SIZE):
+        yield values[start:start + IN_LIST_SIZE]
+
+
+def iter_csv(stream) -> Iterator[dict]:
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for record in reader:
+        yield {key: (value or None) for key, value in record.items() if key in IMPORT_FIELDS}
+
+def iter_ndjson(stream) -> Iterator[dict]:
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def iter_records(stream, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        return iter_csv(stream)
+    if fmt == "ndjson":
+        return iter_ndjson(stream)
+    raise HTTPException(status_code=400, detail="Unsupported format, use csv or ndjson")
+
+def detect_format(filename: Optional[str]) -> str:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+# Names are resolved against in-memory maps that persist for the whole import: projects and
+# departments come from the reference cache, managers start from it and grow with the file.
+# Managers imported in the same batch get their id once the batch is inserted.
+class EmployeeImporter:
+    def __init__(self, db: Session, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.result = ImportResult()
+        self.projects: Dict[str, int] = reference_cache.get(db, "project").by_name
+        self.departments: Dict[str, int] = reference_cache.get(db, "department").by_name
+        self.managers: Dict[str, Optional[int]] = dict(reference_cache.get(db, "manager").by_name)
+        self.seen_ids: Set[str] = set()
+        # Managers and HR admins may report to any employee, those names are looked up as they come
+        self.other_managers: Dict[str, int] = {}
+
+    def fail(self, row: int, error: str, employee_id: Optional[str] = None):
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(ImportRowError(row=row, employee_id=employee_id, error=error))
+
+    # A parse error ends the import after the rows before it are imported, so the client can
+    # resume from parse_error.row
+    def run(self, records: Iterable[dict]) -> ImportResult:
+        batch = []
+        row = 0
+        records = iter(records)
+        while True:
+            try:
+                record = next(records, None)
+            except PARSE_ERRORS as e:
+                self.result.parse_error = ImportRowError(row=row + 1, error=f"Could not parse file: {e}")
+                break
+            if record is None:
+                break
+            row += 1
+            batch.append((row, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.result
+
+    def import_batch(self, batch):
+        employees = []
+        for row, record in batch:
+            try:
+                employees.append((row, EmployeeCreate(**record)))
+            except (ValidationError, TypeError) as e:
+                self.fail(row, str(e), record.get("employee_id") if isinstance(record, dict) else None)
+
+        ids = [employee.employee_id for _, employee in employees]
+        # employee_id is unique across tenants, so the duplicate check looks at every tenant
+        existing = set()
+        for chunk in in_chunks(ids):
+            existing.update(self.db.scalars(
+                select(Employee.employee_id).where(Employee.employee_id.in_(chunk)).execution_options(all_tenants=True)
+            ))
+
+        # Managers first, so members of this batch may report to a manager imported in the same batch
+        employees.sort(key=lambda item: item[1].role == RoleEnum.member)
+        self.resolve_other_managers([
+            employee.manager_name for _, employee in employees
+            if employee.role != RoleEnum.member and employee.manager_name
+            and employee.manager_name not in self.managers and employee.manager_name not in self.other_managers
+        ])
+        values = []
+        for row, employee in employees:
+            error = None
+            if employee.employee_id in existing or employee.employee_id in self.seen_ids:
+                error = "Employee with this ID already exists"
+            elif employee.role == RoleEnum.member and employee.manager_name and employee.manager_name not in self.managers:
+                error = "Member must have a Manager as manager name"
+            elif employee.project_name and employee.project_name not in self.projects:
+                error = "Project not found"
+            elif employee.department_name and employee.department_name not in self.departments:
+                error = "Department does not exist"
+            if error:
+                self.fail(row, error, employee.employee_id)
+                continue
+            self.seen_ids.add(employee.employee_id)
+            if employee.role == RoleEnum.manager:
+                self.managers.setdefault(employee.employee_name, None)
+            values.append(with_tenant({
+                "employee_id": employee.employee_id,
+                "employee_name": employee.employee_name,
+                "designation": employee.designation,
+                "role": employee.role.value,
+                "manager_name": employee.manager_name,
+                "project_id": self.projects.get(employee.project_name),
+                "department_id": self.departments.get(employee.department_name),
+                "manager_id": self.manager_id(employee.manager_name),
+            }))
+
+        if values:
+            # executemany: one round trip per batch instead of one INSERT + commit per employee
+            self.db.execute(insert(Employee), values)
+            self.link_managers(values)
+            self.db.commit()
+            self.result.inserted += len(values)
+            table_versions.bump("employee")
+            if any(value["role"] == RoleEnum.manager.value for value in values):
+                reference_cache.invalidate("manager")
+
+
+    def resolve_other_managers(self, names: List[str]):
+        names = sorted(set(names))
+        for chunk in in_chunks(names):
+            self.other_managers.update(self.db.execute(
+                select(Employee.employee_name, func.min(Employee.emp_id))
+                .where(Employee.employee_name.in_(chunk))
+                .group_by(Employee.employee_name)
+            ).all())
+
+    def manager_id(self, manager_name: Optional[str]) -> Optional[int]:
+        if manager_name in self.managers:
+            return self.managers[manager_name]
+        return self.other_managers.get(manager_name)
+
+    # Fills manager_id for reports of managers from this batch and adds the batch to the hierarchy
+    def link_managers(self, values):
+        emp_ids = {}
+        for chunk in in_chunks([v["employee_id"] for v in values]):
+            emp_ids.update(self.db.execute(
+                select(Employee.employee_id, Employee.emp_id).where(Employee.employee_id.in_(chunk))
+            ).all())
+        for value in values:
+            if value["role"] == RoleEnum.manager.value and self.managers.get(value["employee_name"]) is None:
+                self.managers[value["employee_name"]] = emp_ids[value["employee_id"]]
+        late = []
+        for value in values:
+            if value["manager_id"] is None and value["manager_name"]:
+                value["manager_id"] = self.managers.get(value["manager_name"])
+                if value["manager_id"] is not None:
+                    late.append({"row_id": emp_ids[value["employee_id"]], "row_manager_id": value["manager_id"]})
+        if late:
+            self.db.execute(
+                update(Employee.__table__)
+                .where(Employee.__table__.c.emp_id == bindparam("row_id"))
+                .values(manager_id=bindparam("row_manager_id")),
+                late,
+            )
+        add_employees(self.db.connection(), [(emp_ids[v["employee_id"]], v["manager_id"]) for v in values])
+
+# Bulk import from an uploaded CSV or NDJSON file, streamed in batches. A file that stops
+# parsing gets a 400 whose detail is the partial result, with the rows already imported.
+@router.post("/import", response_model=ImportResult)
+@query_budget(check_repeats=False)  # a fixed set of statements per batch, repeats grow with the file
+def import_employees(
+    db: db_dependency,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE),
+):
+    records = iter_records(file.file, format or detect_format(file.filename))
+    result = EmployeeImporter(db, batch_size).run(records)
+    if result.parse_error is not None:
+        raise HTTPException(status_code=400, detail=result.model_dump())
+    return result
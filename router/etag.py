@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from database import engine, read_route
+from models.tableversion import TableVersion
+from settings import settings
+from .tenancy import current_org_id
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "no-cache"  # clients may store responses but must revalidate with If-None-Match
+
+
+def bump_shared_versions(tables) -> Dict[str, int]:
+    tables = sorted(set(tables))
+    with engine.begin() as conn:
+        existing = set(conn.scalars(select(TableVersion.table_name).where(TableVersion.table_name.in_(tables))))
+        for table in tables:
+            if table not in existing:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(TableVersion).values(table_name=table, version=0))
+                except IntegrityError:
+                    pass  # another worker added it first
+        conn.execute(
+            update(TableVersion).where(TableVersion.table_name.in_(tables)).values(version=TableVersion.version + 1)
+        )
+        return dict(conn.execute(
+            select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+        ).all())
+
+
+def load_shared_versions() -> Dict[str, int]:
+    with engine.connect() as conn:
+        return dict(conn.execute(select(TableVersion.table_name, TableVersion.version)).all())
+
+
+# Per-table write counters, bumped by the write handlers after commit. The counters live in
+# tbl_table_version so every worker derives the same ETags and sees the others' writes: a bump
+# takes its number from the table before the response goes out, so no two workers issue the same
+# version for different data, and each worker reloads the table every
+# table_versions_refresh_seconds. Versions only move forward, if the table can't be reached
+# the local counters carry on alone.
+class TableVersions:
+    def __init__(self):
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._bumped_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # Blocks on the database: sync handlers and threads only, async code awaits abump()
+    def bump(self, *tables: str):
+        self._apply(tables, self._share(tables))
+
+    async def abump(self, *tables: str):
+        shared = await asyncio.get_running_loop().run_in_executor(None, self._share, tables)
+        self._apply(tables, shared)
+
+    # In a fresh context, so the statements don't count towards the request's query budget or metrics
+    def _share(self, tables) -> Optional[Dict[str, int]]:
+        try:
+            return contextvars.Context().run(bump_shared_versions, tables)
+        except Exception:
+            logger.exception("could not bump the shared versions of %s", ", ".join(tables))
+            return None
+
+    def _apply(self, tables, shared: Optional[Dict[str, int]]):
+        with self._lock:
+            now = time.monotonic()
+            for table in tables:
+                version = self._versions[table] + 1
+                if shared and table in shared:
+                    version = max(version, shared[table])
+                self._versions[table] = version
+                self._bumped_at[table] = now
+
+    # A version moving forward here is another worker's write, as recent as far as
+    # written_within() can tell
+    def merge(self, versions: Dict[str, int]):
+        with self._lock:
+            now = time.monotonic()
+            for table, version in versions.items():
+                if version > self._versions[table]:
+                    self._versions[table] = version
+                    self._bumped_at[table] = now
+
+    def get(self, table: str) -> int:
+        return self._versions[table]
+
+    def written_within(self, tables, seconds: float) -> bool:
+        since = time.monotonic() - seconds
+        return any(self._bumped_at.get(table, since) > since for table in tables)
+
+    async def _run(self):
+        while True:
+            try:
+                self.merge(await asyncio.to_thread(load_shared_versions))
+            except Exception:
+                logger.exception("could not load the shared table versions")
+            await asyncio.sleep(settings.table_versions_refresh_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+table_versions = TableVersions()
+
+
+# A replica read of tables written less than the lag bound ago may predate the write, its
+# result is served but not cached or tagged, so the new version only ever names fresh data
+def replica_may_be_stale(tables) -> bool:
+    return read_route.get() == "replica" and table_versions.written_within(tables, settings.replica_max_lag_seconds)
+
+
+# Strong ETag for a listing: tenant, path, query and the shared versions of every table it reads,
+# the same on every worker
+def compute_etag(request: Request, tables) -> str:
+    parts = [str(current_org_id()), request.url.path, str(sorted(request.query_params.multi_items()))]
+    parts += [f"{table}={table_versions.get(table)}" for table in tables]
+    return '"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:24] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+# Dependency for conditional GETs. A matching If-None-Match ends the request with 304 before
+# the handler runs, so nothing is queried or serialized; otherwise the handler gets the ETag
+# to set on its response with with_etag().
+class ConditionalGet:
+    def __init__(self, *tables: str):
+        self.tables = tables
+
+    def __call__(self, request: Request) -> Optional[str]:
+        etag = compute_etag(request, self.tables)
+        if etag_matches(request, etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+        return None if replica_may_be_stale(self.tables) else etag
+
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    if etag is None:
+        return response
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
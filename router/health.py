@@ -0,0 +1,86 @@
+import asyncio
+import time
+from dataclasses import asdict
+from database import engine, async_engine, replica_engine, async_replica_engine, pool_status
+from settings import settings
+from .response_cache import response_cache
+from .read_routing import replica_monitor
+from fastapi import APIRouter, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+router = APIRouter()
+
+
+def pool_exhausted(engine) -> bool:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return False
+    return pool.checkedin() == 0 and pool.checkedout() >= pool.size() + pool._max_overflow
+
+
+async def ping_database() -> float:
+    # Round trip in milliseconds, bounded so a stuck pool fails the probe instead of hanging it
+    async def ping():
+        start = time.perf_counter()
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return (time.perf_counter() - start) * 1000
+
+    return await asyncio.wait_for(ping(), timeout=settings.db_ready_timeout)
+
+
+@router.get("/ready")
+async def readiness():
+    if pool_exhausted(async_engine):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Connection pool exhausted")
+    try:
+        latency = await ping_database()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database ping timed out")
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Database unavailable: {e}")
+    return {"status": "ready", "db_latency_ms": round(latency, 3)}
+
+
+@router.get("/pool")
+async def pool():
+    try:
+        latency = round(await ping_database(), 3)
+    except Exception:
+        latency = None
+    pools = {"sync_pool": pool_status(engine), "async_pool": pool_status(async_engine)}
+    if replica_engine is not None:
+        pools.update(replica_sync_pool=pool_status(replica_engine), replica_async_pool=pool_status(async_replica_engine))
+    return {
+        "db_latency_ms": latency,
+        **pools,
+        "config": {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+        },
+    }
+
+
+@router.get("/cache")
+async def cache():
+    return {"response_cache": response_cache.stats()}
+
+
+@router.get("/replica")
+async def replica():
+    if replica_engine is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        **asdict(replica_monitor.state),
+        "config": {
+            "sticky_seconds": settings.replica_sticky_seconds,
+            "lag_fallback": settings.replica_lag_fallback,
+            "max_lag_seconds": settings.replica_max_lag_seconds,
+            "check_seconds": settings.replica_check_seconds,
+        },
+    }
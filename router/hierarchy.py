@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, insert, literal, select, true, update
+from sqlalchemy.orm import aliased
+from models.employee import Employee
+from models.employeehierarchy import EmployeeHierarchy
+
+Hierarchy = EmployeeHierarchy.__table__
+
+# Links a new employee under a manager: every ancestor of the manager becomes an ancestor
+# of the employee one level deeper. Executed with executemany for a whole batch.
+link_under_manager = insert(Hierarchy).from_select(
+    ["ancestor_id", "descendant_id", "depth"],
+    select(Hierarchy.c.ancestor_id, bindparam("emp_id"), Hierarchy.c.depth + 1)
+    .where(Hierarchy.c.descendant_id == bindparam("manager_id")),
+)
+
+
+def subtree_ids(conn, emp_id: int) -> List[int]:
+    return list(conn.scalars(select(Hierarchy.c.descendant_id).where(Hierarchy.c.ancestor_id == emp_id)))
+
+
+# New employees, in an order where each manager is linked before its reports
+def add_employees(conn, pairs: Iterable[Tuple[int, Optional[int]]]):
+    pending: Dict[int, Optional[int]] = dict(pairs)
+    if not pending:
+        return
+    conn.execute(insert(Hierarchy), [
+        {"ancestor_id": emp_id, "descendant_id": emp_id, "depth": 0} for emp_id in pending
+    ])
+    ordered = []
+    while pending:
+        ready = [emp_id for emp_id, manager_id in pending.items() if manager_id not in pending]
+        if not ready:
+            # A reporting cycle inside the batch, break it at one employee
+            pending[next(iter(pending))] = None
+            continue
+        for emp_id in ready:
+            ordered.append((emp_id, pending.pop(emp_id)))
+    links = [{"emp_id": emp_id, "manager_id": manager_id} for emp_id, manager_id in ordered if manager_id is not None]
+    if links:
+        conn.execute(link_under_manager, links)
+
+
+# Cuts the links between a subtree and everything above it. Subtree ids are read first,
+# MySQL can't delete from a table that the same statement selects from.
+def detach_subtree(conn, emp_id: int) -> List[int]:
+    subtree = subtree_ids(conn, emp_id)
+    if subtree:
+        conn.execute(delete(Hierarchy).where(
+            Hierarchy.c.descendant_id.in_(subtree),
+            Hierarchy.c.ancestor_id.notin_(subtree),
+        ))
+    return subtree
+
+
+def move_employee(conn, emp_id: int, manager_id: Optional[int]):
+    if manager_id is not None and manager_id in subtree_ids(conn, emp_id):
+        raise HTTPException(status_code=400, detail="Manager cannot report to their own report")
+    detach_subtree(conn, emp_id)
+    if manager_id is None:
+        return
+    above, below = aliased(EmployeeHierarchy), aliased(EmployeeHierarchy)
+    conn.execute(insert(Hierarchy).from_select(
+        ["ancestor_id", "descendant_id", "depth"],
+        # Every ancestor of the new manager times every member of the moved subtree
+        select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+        .select_from(above)
+        .join(below, true())
+        .where(above.descendant_id == manager_id, below.ancestor_id == emp_id),
+    ))
+
+
+# Reports of a removed employee become roots of their own subtrees
+def remove_employee(conn, emp_id: int):
+    detach_subtree(conn, emp_id)
+    conn.execute(delete(Hierarchy).where(
+        (Hierarchy.c.ancestor_id == emp_id) | (Hierarchy.c.descendant_id == emp_id)
+    ))
+    conn.execute(update(Employee).where(Employee.manager_id == emp_id).values(manager_id=None, manager_name=None))
+
+
+# Set-based remove_employee for many employees at once (a department being deleted): every
+# hierarchy row of the removed employees and of everyone below them is dropped, then the
+# survivors below are linked again from their manager_id, reports of a removed employee as roots
+def remove_employees(conn, emp_ids: List[int], chunk: int = 1000):
+    removed = set(emp_ids)
+    if not removed:
+        return
+    below = set()
+    for start in range(0, len(emp_ids), chunk):
+        below.update(conn.scalars(
+            select(Hierarchy.c.descendant_id).where(Hierarchy.c.ancestor_id.in_(emp_ids[start:start + chunk]))
+        ))
+    affected = sorted(below | removed)
+    for start in range(0, len(emp_ids), chunk):
+        conn.execute(update(Employee).where(Employee.manager_id.in_(emp_ids[start:start + chunk]))
+                     .values(manager_id=None, manager_name=None))
+    for start in range(0, len(affected), chunk):
+        conn.execute(delete(Hierarchy).where(Hierarchy.c.descendant_id.in_(affected[start:start + chunk])))
+    survivors = sorted(below - removed)
+    managers = {}
+    for start in range(0, len(survivors), chunk):
+        managers.update(conn.execute(
+            select(Employee.emp_id, Employee.manager_id).where(Employee.emp_id.in_(survivors[start:start + chunk]))
+        ).all())
+    add_employees(conn, managers.items())
+
+
+# Full recompute from Employee.manager_id, one INSERT ... SELECT per level.
+# Pairs that already exist are skipped, so cycles in backfilled data terminate.
+def rebuild_hierarchy(conn, max_depth: int = 100):
+    existing = aliased(EmployeeHierarchy)
+    conn.execute(delete(Hierarchy))
+    conn.execute(insert(Hierarchy).from_select(
+        ["ancestor_id", "descendant_id", "depth"],
+        select(Employee.emp_id, Employee.emp_id, literal(0)),
+    ))
+    for depth in range(1, max_depth + 1):
+        inserted = conn.execute(insert(Hierarchy).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(Hierarchy.c.ancestor_id, Employee.emp_id, literal(depth))
+            .join(Employee, Employee.manager_id == Hierarchy.c.descendant_id)
+            .where(Hierarchy.c.depth == depth - 1)
+            .where(~select(existing.depth).where(
+                existing.ancestor_id == Hierarchy.c.ancestor_id,
+                existing.descendant_id == Employee.emp_id,
+            ).exists()),
+        )).rowcount
+        if not inserted:
+            break
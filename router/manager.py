@@ -1,14 +1,13 @@
-from database import engine, connect_db, db_dependency
+from database import connect_db, async_db_dependency
 from models.manager import Manager
 from .basic_import import *
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List
 router = APIRouter()
 
-Manager.metadata.create_all(bind=engine)
 
 class ManagerCreate(BaseModel):
     manager_name: str
@@ -29,35 +28,37 @@ class ManagerUpdate(BaseModel):
 
 
 @router.post("/manager/", response_model=ManagerResponse)
-async def create_manager(manager_data: ManagerCreate, db: db_dependency):
+async def create_manager(manager_data: ManagerCreate, db: async_db_dependency):
     new_manager = Manager(manager_name=manager_data.manager_name)
     
     db.add(new_manager)
-    db.commit()
-    db.refresh(new_manager)
+    await db.commit()
+    await db.refresh(new_manager)
     return new_manager
 
 @router.get("/manager/", response_model=List[ManagerResponse])
-async def get_managers(db: db_dependency):
-    managers = db.query(Manager).all()
-    return managers
+async def get_managers(db: async_db_dependency):
+    result = await db.execute(select(Manager))
+    return result.scalars().all()
 
 @router.delete("/manager/{manager_id}", response_model=ManagerResponse)
-async def delete_manager(manager_id: int, db: db_dependency):
-    manager = db.query(Manager).filter(Manager.manager_id == manager_id).first()
+async def delete_manager(manager_id: int, db: async_db_dependency):
+    result = await db.execute(select(Manager).filter(Manager.manager_id == manager_id))
+    manager = result.scalars().first()
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
-    db.delete(manager)
-    db.commit()
+    await db.delete(manager)
+    await db.commit()
     return manager
 
 @router.patch("/manager/{manager_id}", response_model=ManagerResponse)
-async def update_manager(manager_id: int, manager_data: ManagerUpdate, db: db_dependency):
-    manager = db.query(Manager).filter(Manager.manager_id == manager_id).first()
+async def update_manager(manager_id: int, manager_data: ManagerUpdate, db: async_db_dependency):
+    result = await db.execute(select(Manager).filter(Manager.manager_id == manager_id))
+    manager = result.scalars().first()
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
     
     manager.manager_name = manager_data.manager_name
-    db.commit()
-    db.refresh(manager)
+    await db.commit()
+    await db.refresh(manager)
     return manager
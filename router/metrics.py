@@ -0,0 +1,243 @@
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from database import engine, async_engine, replica_engine, async_replica_engine, pool_status
+from .response_cache import response_cache
+
+router = APIRouter()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Queries and DB time of the request being handled. Starlette copies the context into the
+# threadpool and SQLAlchemy into its greenlets, so sync and async sessions both see it.
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def label_text(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, values, value) for values, value in self._values.items()]
+
+    def label_names(self, sample_name: str):
+        return self.labels
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *values):
+        self.inc(*values, amount=-1)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._values: Dict[tuple, list] = {}  # per bucket counts, then sum and count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *values):
+        with self._lock:
+            series = self._values.get(values)
+            if series is None:
+                series = self._values[values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(values, list(series)) for values, series in self._values.items()]
+        samples = []
+        for values, series in snapshot:
+            for bound, count in zip(self.buckets, series):
+                samples.append((f"{self.name}_bucket", values + (format(bound, "g"),), count))
+            samples.append((f"{self.name}_bucket", values + ("+Inf",), series[-1]))
+            samples.append((f"{self.name}_sum", values, series[-2]))
+            samples.append((f"{self.name}_count", values, series[-1]))
+        return samples
+
+    def label_names(self, sample_name: str):
+        return self.labels + ("le",) if sample_name.endswith("_bucket") else self.labels
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, values, value in metric.samples():
+                lines.append(f"{name}{label_text(metric.label_names(name), values)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS))
+requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ("method",)))
+request_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements issued per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS))
+request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per HTTP request", ("method", "route"), LATENCY_BUCKETS))
+background_queries = registry.register(Counter(
+    "db_background_queries_total", "SQL statements issued outside HTTP requests (scheduler, imports)"))
+
+
+def route_label(scope) -> str:
+    # Route templates, not raw paths, so ids don't explode the label cardinality
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+# Pure ASGI middleware, outermost so cached responses and CORS preflights are timed too
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        requests_in_progress.inc(method)
+        start = time.perf_counter()
+
+        async def record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_stats.reset(token)
+            requests_in_progress.dec(method)
+            route = route_label(scope)
+            requests_total.inc(method, route, str(status))
+            request_duration.observe(elapsed, method, route)
+            request_queries.observe(stats.queries, method, route)
+            request_db_duration.observe(stats.db_seconds, method, route)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = request_stats.get()
+    if stats is None:
+        background_queries.inc()
+        return
+    stats.queries += 1
+    stats.db_seconds += elapsed
+
+
+def handle_error(exception_context):
+    # after_cursor_execute doesn't fire for a failed statement, drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(sync_engine):
+    if not event.contains(sync_engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "handle_error", handle_error)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+    instrument_engine(async_replica_engine.sync_engine)
+
+
+# Pool gauges are read when scraped, from the same numbers /health/pool reports
+def pool_lines() -> list:
+    lines = []
+    gauges = (
+        ("db_pool_checked_out", "checked_out", "gauge", "Connections checked out of the pool"),
+        ("db_pool_overflow", "overflow", "gauge", "Overflow connections open beyond pool_size"),
+        ("db_pool_checkouts_total", "checkouts", "counter", "Connections handed out by the pool"),
+        ("db_pool_timeouts_total", "timeouts", "counter", "Checkouts that gave up after pool_timeout"),
+    )
+    pools = {"sync": pool_status(engine), "async": pool_status(async_engine)}
+    if replica_engine is not None:
+        pools.update({"replica_sync": pool_status(replica_engine), "replica_async": pool_status(async_replica_engine)})
+    for name, key, kind, help in gauges:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{engine="{label}"}} {status[key]}' for label, status in pools.items() if key in status]
+    return lines
+
+
+def cache_lines() -> list:
+    stats = response_cache.stats()
+    lines = []
+    for key in ("hits", "misses", "evictions"):
+        name = f"response_cache_{key}_total"
+        lines += [f"# HELP {name} Response cache {key}", f"# TYPE {name} counter", f"{name} {stats[key]}"]
+    lines += ["# HELP response_cache_bytes Bytes held by the response cache", "# TYPE response_cache_bytes gauge",
+              f"response_cache_bytes {stats['bytes']}"]
+    return lines
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    body = registry.render() + "\n".join(pool_lines() + cache_lines()) + "\n"
+    return PlainTextResponse(body, media_type=CONTENT_TYPE)
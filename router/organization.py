@@ -3,17 +3,19 @@ from router.basic_import import *
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel, EmailStr, Field, validator
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from models.organization import Organization
 from models.user import Users
-from database import engine, connect_db, db_dependency
+from database import connect_db, async_db_dependency
 from router.users.login import get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from router.users.principal import principal_cache
+from router.pagination import pagination_dependency, apaginate
  
 from enum import Enum
 import re
  
 router = APIRouter()
  
-Organization.metadata.create_all(bind=engine)
  
 class Role(str, Enum):
     member = "Member"
@@ -42,12 +44,12 @@ class OrganizationBase(BaseModel):
  
  
 async def create_super_user(db, user: dict):
+    # user_password is the organization's password hash, reuse it instead of hashing the hash again
     user_instance = Users(**user)
     user_instance.timestamp = await get_current_ist_time()
-    user_instance.user_password = get_password_hash(user["user_password"])
     db.add(user_instance)
-    db.commit()
-    db.refresh(user_instance)
+    await db.commit()
+    await db.refresh(user_instance)
  
     login_data = await auto_login(user_instance.__dict__)
     return login_data
@@ -56,7 +58,7 @@ async def create_super_user(db, user: dict):
 async def auto_login(user: dict):
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["user_email"], "role": user["role"]},
+        data={"sub": user["user_email"], "user_id": user["user_id"], "org_id": user["org_id"], "role": user["role"]},
         expires_delta=access_token_expires
     )
     return {
@@ -70,7 +72,7 @@ async def auto_login(user: dict):
  
  
 @router.post("/create-organization/")
-async def create_organization(org: OrganizationBase, db: db_dependency):
+async def create_organization(org: OrganizationBase, db: async_db_dependency):
     try:
         # Check if email or phone number already exists
         is_email_found = await check_instance(Organization, "org_email", org.org_email, db)
@@ -83,11 +85,11 @@ async def create_organization(org: OrganizationBase, db: db_dependency):
         # Create organization instance
         org_instance = Organization(**org.dict())
         org_instance.org_logo = 'https://example.com/default_logo.png'  # Default logo
-        org_instance.password = get_password_hash(org.password)
+        org_instance.password = await get_password_hash(org.password)
        
         db.add(org_instance)
-        db.commit()
-        db.refresh(org_instance)
+        await db.commit()
+        await db.refresh(org_instance)
  
         payload = {
             "org_id": org_instance.org_id,
@@ -114,68 +116,71 @@ async def create_organization(org: OrganizationBase, db: db_dependency):
  
  
 @router.get("/get-all-organization/")
-async def get_all_organization(db: db_dependency):
-    organizations = db.query(Organization).all()
-    return {"organizations": organizations}
+async def get_all_organization(db: async_db_dependency, page: pagination_dependency):
+    return await apaginate(db, select(Organization), [Organization.org_id], page)
  
  
 @router.get("/get-organization/{org_id}")
-async def get_organization(org_id: int, db: db_dependency):
-    org = db.query(Organization).filter(Organization.org_id == org_id).first()
+async def get_organization(org_id: int, db: async_db_dependency):
+    result = await db.execute(select(Organization).filter(Organization.org_id == org_id))
+    org = result.scalars().first()
     if not org:
         raise HTTPException(status_code=404, detail="Organization Not Found")
     return org
  
  
 @router.patch("/update-organization/{org_id}")
-async def update_organization(org_id: int, org_base: OrganizationBase, db: db_dependency):
+async def update_organization(org_id: int, org_base: OrganizationBase, db: async_db_dependency):
     org = await check_instance(Organization, "org_id", org_id, db)
     if org is None:
         raise HTTPException(status_code=404, detail="Organization not found")
  
     # Update organization fields
-    for key, value in org_base.dict(exclude_unset=True).items():
+    password_hash = await get_password_hash(org_base.password) if org_base.password else None
+    for key, value in org_base.dict(exclude_unset=True, exclude={"password"}).items():
         setattr(org, key, value)
     if org_base.org_logo and org_base.org_logo != "":
         org.org_logo = org_base.org_logo
  
-    if org_base.password:
-        org.password = org_base.password
+    if password_hash:
+        org.password = password_hash
  
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
  
-    user = db.query(Users).filter(Users.org_id == org_id).first()
+    result = await db.execute(select(Users).filter(Users.org_id == org_id))
+    user = result.scalars().first()
     if user:
+        principal_cache.invalidate(user.user_email)
         if org_base.full_name:
             user.user_name = org_base.full_name
         if org_base.org_email:
             user.user_email = org_base.org_email
         if org_base.org_mobile_number:
             user.user_mobile = org_base.org_mobile_number
-        if org_base.password:
-            user.user_password = Users.hash_password(org_base.password)
+        if password_hash:
+            user.user_password = password_hash
  
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
  
     return succes_response(data=org, msg="Organization updated successfully.")
  
  
 @router.get("/get-all-organization/")
-async def get_all_organization(db:db_dependency):
-    organizations = db.query(Organization).all()
-    return {"organizations": organizations}
+async def get_all_organization(db: async_db_dependency, page: pagination_dependency):
+    return await apaginate(db, select(Organization), [Organization.org_id], page)
  
 @router.get("/get-organization/{org_id}")
-async def get_organization(org_id: int, db:db_dependency):
-    org = db.query(Organization).filter(Organization.org_id == org_id).first()
+async def get_organization(org_id: int, db: async_db_dependency):
+    result = await db.execute(select(Organization).filter(Organization.org_id == org_id))
+    org = result.scalars().first()
     if not org:
         raise HTTPException(status_code=404, detail="Organization Not Found")
     return org
  
 # @router.patch("/update-organization/{org_id}")
-# async def update_organization(org_id: int, org_base: OrganizationBase, db: db_dependency):
+# async def update_organization(org_id: int, org_base: OrganizationBase, db: async_db_dependency):
 #     org = await check_instance(Organization, "org_id", org_id, db)
 #     if org is None:
 #         raise HTTPException(status_code=404, detail="Organization not found")
@@ -0,0 +1,87 @@
+import base64
+import json
+from typing import Annotated, Generic, List, Optional, Sequence, TypeVar
+from fastapi import Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select, tuple_
+from settings import settings
+
+T = TypeVar("T")
+
+
+# Response envelope shared by every list endpoint
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        include_total: bool = Query(False, description="also count all matching rows"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.include_total = include_total
+
+
+pagination_dependency = Annotated[PageParams, Depends()]
+
+
+# Cursors are opaque to clients: base64 of the sort key values of the last row served
+def encode_cursor(values: Sequence) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+# keys is the sort key, ending with the primary key so it is unique, e.g. [Model.name, Model.id]
+def keyset_statement(stmt: Select, keys: Sequence, page: PageParams) -> Select:
+    if page.cursor:
+        values = decode_cursor(page.cursor, len(keys))
+        if len(keys) == 1:
+            stmt = stmt.where(keys[0] > values[0])
+        else:
+            stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+    return stmt.order_by(*keys).limit(page.limit + 1)
+
+
+def count_statement(stmt: Select) -> Select:
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+def selects_entity(stmt: Select) -> bool:
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+def build_page(rows: list, keys: Sequence, page: PageParams, total: Optional[int]) -> dict:
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+    next_cursor = encode_cursor([getattr(rows[-1], key.key) for key in keys]) if has_more else None
+    return {"items": rows, "next_cursor": next_cursor, "total": total}
+
+
+def paginate(db, stmt: Select, keys: Sequence, page: PageParams) -> dict:
+    total = db.execute(count_statement(stmt)).scalar_one() if page.include_total else None
+    result = db.execute(keyset_statement(stmt, keys, page))
+    rows = result.scalars().all() if selects_entity(stmt) else result.all()
+    return build_page(rows, keys, page, total)
+
+
+async def apaginate(db, stmt: Select, keys: Sequence, page: PageParams) -> dict:
+    total = (await db.execute(count_statement(stmt))).scalar_one() if page.include_total else None
+    result = await db.execute(keyset_statement(stmt, keys, page))
+    rows = result.scalars().all() if selects_entity(stmt) else result.all()
+    return build_page(rows, keys, page, total)
@@ -1,14 +1,17 @@
-from database import engine, connect_db, db_dependency
+from database import connect_db, db_dependency
+from .pagination import Page, pagination_dependency, paginate
+from .serialization import page_response
+from .etag import ConditionalGet, with_etag
+from .reference_cache import reference_cache
 from models.performanceparameter import PerformanceParameter
 from .basic_import import *
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import func, select
+from typing import List, Optional
 router = APIRouter()
 
-PerformanceParameter.metadata.create_all(bind=engine)
 
 
 class PerformanceParameterCreate(BaseModel):
@@ -36,14 +39,19 @@ def create_performance_parameter(parameter_data: PerformanceParameterCreate, db:
     )
     db.add(new_parameter)
     db.commit()
+    reference_cache.invalidate("parameter")
     db.refresh(new_parameter)
     return new_parameter
 
 # GET operation to retrieve all performance parameters
-@router.get("/parameters", response_model=List[PerformanceParameterResponse])
-def get_performance_parameters(db: db_dependency):
-    parameters = db.query(PerformanceParameter).all()
-    return parameters
+@router.get("/parameters", response_model=Page[PerformanceParameterResponse])
+def get_performance_parameters(
+    db: db_dependency,
+    page: pagination_dependency,
+    etag: Optional[str] = Depends(ConditionalGet("parameter")),
+):
+    result = paginate(db, select(PerformanceParameter), [PerformanceParameter.parameter_id], page)
+    return with_etag(page_response(PerformanceParameterResponse, result), etag)
 
 # GET operation to retrieve a single performance parameter by id
 @router.get("/parameters/{parameter_id}", response_model=PerformanceParameterResponse)
@@ -62,7 +70,8 @@ def update_performance_parameter(
 ):
     parameter = db.query(PerformanceParameter).filter(PerformanceParameter.parameter_id == parameter_id).first()
     
-    if not parameter:
+    # Shared parameters (org_id NULL) are read-only to every tenant
+    if not parameter or parameter.org_id is None:
         raise HTTPException(status_code=404, detail="Performance parameter not found")
     
     parameter.name = parameter_data.name
@@ -70,6 +79,7 @@ def update_performance_parameter(
     parameter.max_rating = parameter_data.max_rating
 
     db.commit()
+    reference_cache.invalidate("parameter")
     db.refresh(parameter)
     
     return parameter
@@ -79,10 +89,11 @@ def update_performance_parameter(
 def delete_performance_parameter(parameter_id: int, db: db_dependency):
     parameter = db.query(PerformanceParameter).filter(PerformanceParameter.parameter_id == parameter_id).first()
 
-    if not parameter:
+    if not parameter or parameter.org_id is None:
         raise HTTPException(status_code=404, detail="Performance parameter not found")
 
     db.delete(parameter)
     db.commit()
+    reference_cache.invalidate("parameter")
 
     return {"detail": "Performance parameter deleted successfully"}
\ No newline at end of file
@@ -1,15 +1,23 @@
-from fastapi import FastAPI, HTTPException, Depends,APIRouter
+from fastapi import FastAPI, HTTPException, Depends,APIRouter, Query
 from sqlalchemy.orm import Session
-from database import engine, connect_db, db_dependency
+from database import connect_db, db_dependency
 from models.employee import Employee
 from models.session import SessionModel
 from models.performanceparameter import PerformanceParameter
 from models.performancerating import PerformanceRating
 from pydantic import BaseModel
-from typing import List
+from sqlalchemy import insert, select, func
+from typing import Dict, List, Optional
+from models.departments import Department
+from .reference_cache import reference_cache
+from .employee import manager_id_expression
+from .analytics import grouped_rating_stats
+from .rating_rollups import NO_DEPARTMENT, ROLLUPS, add_ratings
+from .response_cache import cache_response
+from .query_budget import query_budget
+from .tenancy import with_tenant
 
 router = APIRouter()
-PerformanceRating.metadata.create_all(bind=engine)
 
 
 # Pydantic models for data validation
@@ -33,50 +41,254 @@ class EmployeePerformance(BaseModel):
     designation: str
     parameters: List[dict]
 
-# Pydantic model for rating submission
-class RatingSubmission(BaseModel):
-    ratings: List[dict]
+# Pydantic models for bulk rating submission
+class ParameterRating(BaseModel):
+    parameter_id: int
+    rating: int
+    comments: Optional[str] = ""
+
+class EmployeeRatings(BaseModel):
+    emp_id: int
+    ratings: List[ParameterRating]
+
+class BulkRatingSubmission(BaseModel):
+    ratings: List[EmployeeRatings]
+
+class RatingItem(BaseModel):
+    emp_id: int
+    parameter_id: int
+    rating: int
+    comments: Optional[str] = ""
+
+class RatingFailure(BaseModel):
+    emp_id: int
+    parameter_id: int
+    error: str
+
+class RatingSubmissionResult(BaseModel):
+    message: str
+    inserted: int
+    failed: int
+    failures: List[RatingFailure] = []
+
+class GroupStats(BaseModel):
+    id: Optional[int] = None
+    name: str
+    count: int
+    mean: float
+    median: float
+    p10: float
+    p90: float
+    std: float
+    min: int
+    max: int
+    histogram: Dict[int, int]
+
+class SessionAnalytics(BaseModel):
+    session_id: int
+    total_ratings: int
+    parameters: List[GroupStats]
+    departments: List[GroupStats]
+
+class RollupStats(BaseModel):
+    id: Optional[int] = None  # None for the ratings of employees without a department
+    name: Optional[str] = None
+    count: int
+    mean: float
+    std: float
+    min: Optional[int] = None
+    max: Optional[int] = None
+
+INSERT_CHUNK_SIZE = 1000
+
+
+# Validates every rating against maps loaded once (session, parameter ranges, employees),
+# then writes the valid ones with multi-row INSERTs and a single commit
+def insert_ratings(db: Session, session_id: int, items: List[RatingItem], manager_name: Optional[str] = None) -> RatingSubmissionResult:
+    if db.scalar(select(SessionModel.session_id).where(SessionModel.session_id == session_id)) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    emp_ids = {item.emp_id for item in items}
+    ranges = {
+        row.parameter_id: (row.min_rating, row.max_rating)
+        for row in reference_cache.get(db, "parameter").by_id.values()
+    }
+    employees = set(db.scalars(select(Employee.emp_id).where(Employee.emp_id.in_(emp_ids)))) if emp_ids else set()
+    # With a manager_name, only that manager's direct reports may be rated
+    reports = employees
+    if manager_name is not None and employees:
+        reports = set(db.scalars(
+            select(Employee.emp_id).where(Employee.emp_id.in_(employees), Employee.manager_id == manager_id_expression(manager_name))
+        ))
+
+    rows, failures = [], []
+    for item in items:
+        bounds = ranges.get(item.parameter_id)
+        if item.emp_id not in employees:
+            error = "Employee not found"
+        elif item.emp_id not in reports:
+            error = "Employee does not report to this manager"
+        elif bounds is None:
+            error = "Performance parameter not found"
+        elif not bounds[0] <= item.rating <= bounds[1]:
+            error = f"Rating must be between {bounds[0]} and {bounds[1]}"
+        else:
+            rows.append(with_tenant({
+                "emp_id": item.emp_id,
+                "parameter_id": item.parameter_id,
+                "session_id": session_id,
+                "rating": item.rating,
+                "comments": item.comments,
+            }))
+            continue
+        failures.append(RatingFailure(emp_id=item.emp_id, parameter_id=item.parameter_id, error=error))
+
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.execute(insert(PerformanceRating).values(rows[start:start + INSERT_CHUNK_SIZE]))
+    add_ratings(db.connection(), rows)
+    db.commit()
+
+    return RatingSubmissionResult(
+        message="Ratings submitted successfully" if not failures else "Some ratings were rejected",
+        inserted=len(rows),
+        failed=len(failures),
+        failures=failures,
+    )
 
 # 1. Session Creation by HR (with email notification to managers)
 
 @router.get("/session/{session_id}/employees", response_model=List[EmployeePerformance])
+@query_budget(3)
+@cache_response(ttl=60, tags=("employee", "manager", "parameter"))
 def get_employees_for_session(session_id: int, manager_name: str, db:db_dependency):
-    employees = db.query(Employee).filter(Employee.manager_name == manager_name).all()
+    employees = db.query(Employee).filter(Employee.manager_id == manager_id_expression(manager_name)).all()
 
     if not employees:
         raise HTTPException(status_code=404, detail="No employees found for this manager")
 
+    parameters = [{"id": p.parameter_id, "name": p.name} for p in reference_cache.get(db, "parameter").by_id.values()]
     employee_performance_list = []
     for emp in employees:
-        parameters = db.query(PerformanceParameter).all()
-
         employee_performance_list.append({
             "emp_id": emp.emp_id,
             "name": emp.employee_name,
             "designation": emp.designation,
-            "parameters": [{"id": p.parameter_id, "name": p.name} for p in parameters]
+            "parameters": parameters
         })
 
     return employee_performance_list
 
 # 4. Submit Performance Rating
-@router.post("/session/{session_id}/rate")
-def submit_performance_rating(session_id: int, rating_submission: RatingSubmission, manager_name: str, db:db_dependency):
-    # For each rating in the submission, create a performance rating
-    for rating in rating_submission.ratings:
-        emp_id = rating["emp_id"]
-        for param_rating in rating["ratings"]:
-            new_rating = PerformanceRating(
-                emp_id=emp_id,
-                parameter_id=param_rating["parameter_id"],
-                session_id=session_id,
-                rating=param_rating["rating"],
-                comments=param_rating.get("comments", "")
+@router.post("/session/{session_id}/rate", response_model=RatingSubmissionResult)
+def submit_performance_rating(session_id: int, rating_submission: BulkRatingSubmission, manager_name: str, db:db_dependency):
+    items = [
+        RatingItem(emp_id=employee.emp_id, **param_rating.model_dump())
+        for employee in rating_submission.ratings
+        for param_rating in employee.ratings
+    ]
+    return insert_ratings(db, session_id, items, manager_name)
+
+# Session results per parameter and per department: counts and ranges come from SQL
+# GROUP BYs, medians, percentiles, spread and histograms from one NumPy pass over the ratings
+@router.get("/session/{session_id}/analytics", response_model=SessionAnalytics)
+@cache_response(ttl=60, tags=("rating", "session", "employee", "department", "parameter"))
+def get_session_analytics(session_id: int, db: db_dependency):
+    if db.scalar(select(SessionModel.session_id).where(SessionModel.session_id == session_id)) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    department_key = func.coalesce(Employee.department_id, NO_DEPARTMENT)
+    parameter_groups = db.execute(
+        select(
+            PerformanceRating.parameter_id.label("id"),
+            PerformanceParameter.name,
+            func.min(PerformanceRating.rating).label("min"),
+            func.max(PerformanceRating.rating).label("max"),
+        )
+        .join(PerformanceParameter, PerformanceParameter.parameter_id == PerformanceRating.parameter_id)
+        .where(PerformanceRating.session_id == session_id)
+        .group_by(PerformanceRating.parameter_id, PerformanceParameter.name)
+    ).all()
+    department_groups = db.execute(
+        select(
+            department_key.label("id"),
+            Department.department_name.label("name"),
+            func.min(PerformanceRating.rating).label("min"),
+            func.max(PerformanceRating.rating).label("max"),
+        )
+        .select_from(PerformanceRating)
+        .join(Employee, Employee.emp_id == PerformanceRating.emp_id)
+        .outerjoin(Department, Department.department_id == Employee.department_id)
+        .where(PerformanceRating.session_id == session_id)
+        .group_by(department_key, Department.department_name)
+    ).all()
+
+    import numpy as np
+    ratings = np.array(
+        db.execute(
+            select(PerformanceRating.parameter_id, department_key, PerformanceRating.rating)
+            .join(Employee, Employee.emp_id == PerformanceRating.emp_id)
+            .where(PerformanceRating.session_id == session_id)
+        ).all(),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    parameter_stats = grouped_rating_stats(ratings[:, 0], ratings[:, 2])
+    department_stats = grouped_rating_stats(ratings[:, 1], ratings[:, 2])
+
+    # no_group: the key standing for "no group", reported with id None
+    def merge(groups, stats, no_group=None):
+        return [
+            GroupStats(
+                id=None if row.id == no_group else row.id,
+                name=row.name or "Unassigned",
+                min=row.min,
+                max=row.max,
+                **stats[row.id],
             )
-            db.add(new_rating)
+            for row in groups if row.id in stats
+        ]
 
-    db.commit()
-    return {"message": "Ratings submitted successfully"}
+    return SessionAnalytics(
+        session_id=session_id,
+        total_ratings=len(ratings),
+        parameters=merge(parameter_groups, parameter_stats),
+        departments=merge(department_groups, department_stats, no_group=NO_DEPARTMENT),
+    )
+
+# Dashboard read: per-group stats straight from the rollup tables, O(groups) instead of O(ratings)
+@router.get("/session/{session_id}/rollup", response_model=List[RollupStats])
+@cache_response(ttl=60, tags=("rating", "department", "parameter"))
+def get_session_rollup(
+    session_id: int,
+    db: db_dependency,
+    by: str = Query("parameter", pattern="^(employee|parameter|department)$"),
+):
+    # Rollups aren't tenant tables, the session lookup is what keeps them to the caller's tenant
+    if db.scalar(select(SessionModel.session_id).where(SessionModel.session_id == session_id)) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    model, key = ROLLUPS[by]
+    names = {}
+    if by == "parameter":
+        names = {row.parameter_id: row.name for row in reference_cache.get(db, "parameter").by_id.values()}
+    elif by == "department":
+        names = {row.department_id: row.department_name for row in reference_cache.get(db, "department").by_id.values()}
+
+    stats = []
+    for rollup in db.execute(select(model).where(model.session_id == session_id).order_by(getattr(model, key))).scalars():
+        count = rollup.rating_count or 0
+        mean = rollup.rating_sum / count if count else 0.0
+        variance = rollup.rating_sum_sq / count - mean * mean if count else 0.0
+        group_id = getattr(rollup, key)
+        unassigned = by == "department" and group_id == NO_DEPARTMENT
+        stats.append(RollupStats(
+            id=None if unassigned else group_id,
+            name="Unassigned" if unassigned else names.get(group_id),
+            count=count,
+            mean=round(mean, 4),
+            std=round(max(variance, 0.0) ** 0.5, 4),
+            min=rollup.rating_min,
+            max=rollup.rating_max,
+        ))
+    return stats
 
 class RatingSubmission(BaseModel):
     employee_id: int
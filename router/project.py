@@ -1,14 +1,19 @@
-from database import engine, connect_db, db_dependency
+from database import connect_db, async_db_dependency
+from .pagination import Page, pagination_dependency, apaginate
+from .serialization import page_response
+from .etag import ConditionalGet, table_versions, with_etag
+from .reference_cache import reference_cache
+from .query_budget import query_budget
 from models.project import Project
 from models.employee import Employee
 from models.departments import Department
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session,joinedload
+from sqlalchemy.orm import Session,joinedload,selectinload
+from sqlalchemy import select, func, update, delete
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
  
 router = APIRouter()
-Project.metadata.create_all(bind=engine)
  
 class ProjectCreate(BaseModel):
     project_name: str
@@ -28,38 +33,58 @@ class ProjectResponse(BaseModel):
     class Config:
         orm_mode = True    
 
+# ProjectResponse straight from SQL, employees are counted by a correlated subquery instead of loaded
+def project_summary_query():
+    total_employees = (
+        select(func.count(Employee.emp_id))
+        .where(Employee.project_id == Project.project_id)
+        .correlate(Project)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Project.project_id,
+            Project.project_name,
+            func.coalesce(Department.department_name, "Unknown").label("department_name"),
+            total_employees.label("total_employees"),
+        )
+        .outerjoin(Department, Project.department_id == Department.department_id)
+    )
+
+async def fetch_project_response(db, project_id: int):
+    row = (await db.execute(project_summary_query().filter(Project.project_id == project_id))).first()
+    return ProjectResponse(**row._mapping) if row else None
+
 # GET endpoint to retrieve all projects
-@router.get("/projects/", response_model=List[ProjectResponse])
-async def read_projects(db:db_dependency):
-    projects = db.query(Project).all()
-    return [
-        ProjectResponse(
-            project_id=project.project_id,
-            project_name=project.project_name,
-            department_name=project.department.department_name if project.department else "Unknown",
-            total_employees=len(project.employees)  # Calculate total employees from the relationship
-        ) for project in projects
-    ]
+@router.get("/projects/", response_model=Page[ProjectResponse])
+@query_budget(2)
+async def read_projects(
+    db: async_db_dependency,
+    page: pagination_dependency,
+    # Rows carry the department name and an employee count, so those writes change it too
+    etag: Optional[str] = Depends(ConditionalGet("project", "department", "employee")),
+):
+    return with_etag(page_response(ProjectResponse, await apaginate(db, project_summary_query(), [Project.project_id], page)), etag)
 
 # DELETE endpoint to remove a project
 @router.delete("/projects/{project_id}", response_model=dict)
-async def delete_project(project_id: int, db:db_dependency):
-    project = db.query(Project).filter(Project.project_id == project_id).first()
-    if project is None:
+async def delete_project(project_id: int, db: async_db_dependency):
+    if await db.scalar(select(Project.project_id).where(Project.project_id == project_id)) is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Optionally, handle associated employees (e.g., unassign or delete)
-    for employee in project.employees:
-        employee.project_id = None  # Unassign employees from the project, or handle accordingly
-
-    db.delete(project)
-    db.commit()
+    # Unassign its employees with one UPDATE instead of loading and flushing each of them
+    await db.execute(update(Employee).where(Employee.project_id == project_id).values(project_id=None))
+    await db.execute(delete(Project).where(Project.project_id == project_id))
+    await db.commit()
+    await reference_cache.ainvalidate("project")
+    await table_versions.abump("employee")
     return {"detail": "Project deleted successfully"}
 
 # PATCH endpoint to update an existing project
 @router.patch("/projects/{project_id}", response_model=ProjectResponse)
-async def update_project(project_id: int, project_update: ProjectUpdate, db:db_dependency):
-    project = db.query(Project).filter(Project.project_id == project_id).first()
+async def update_project(project_id: int, project_update: ProjectUpdate, db: async_db_dependency):
+    result = await db.execute(select(Project).filter(Project.project_id == project_id))
+    project = result.scalars().first()
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -68,57 +93,41 @@ async def update_project(project_id: int, project_update: ProjectUpdate, db:db_d
         project.project_name = project_update.project_name
 
     if project_update.department_name:
-        department = db.query(Department).filter(Department.department_name == project_update.department_name).first()
-        if department:
-            project.department_id = department.department_id  # Update only if department exists
+        department_id = (await reference_cache.aget(db, "department")).id_for(project_update.department_name)
+        if department_id is not None:
+            project.department_id = department_id  # Update only if department exists
         else:
             raise HTTPException(status_code=400, detail="Department not found")
 
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await reference_cache.ainvalidate("project")
 
-    return ProjectResponse(
-        project_id=project.project_id,
-        project_name=project.project_name,
-        department_name=department.department_name if department else "Unknown",
-        total_employees=len(project.employees)  # Calculate total employees after update
-    )
+    return await fetch_project_response(db, project_id)
 
-# POST endpoint to create a new project
 # POST endpoint to create a new project
 @router.post("/projects/", response_model=ProjectResponse)
-async def create_project(project: ProjectCreate, db: db_dependency):
+@query_budget(5)
+async def create_project(project: ProjectCreate, db: async_db_dependency):
     # Check if the department exists
-    department = db.query(Department).filter(Department.department_name == project.department_name).first()
-    if not department:
+    department_id = (await reference_cache.aget(db, "department")).id_for(project.department_name)
+    if department_id is None:
         raise HTTPException(status_code=400, detail="Department not found")
 
-    # Create the new project
-    new_project = Project(project_name=project.project_name, department_id=department.department_id)
+    # Create the project and move the listed employees onto it in one transaction, a single
+    # UPDATE ... WHERE emp_id IN (...) instead of a SELECT per employee
+    new_project = Project(project_name=project.project_name, department_id=department_id)
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)  # Refresh to get the updated project including its ID
-
-    # Associate employees if provided
+    await db.flush()  # assigns project_id
     if project.employee_ids:
-        for emp_id in project.employee_ids:
-            employee = db.query(Employee).filter(Employee.emp_id == emp_id).first()
-            if employee:
-                employee.project_id = new_project.project_id  # Associate employee with the new project
-
-    db.commit()  # Commit changes
+        await db.execute(
+            update(Employee)
+            .where(Employee.emp_id.in_(set(project.employee_ids)))
+            .values(project_id=new_project.project_id)
+        )
+    await db.commit()
+    await reference_cache.ainvalidate("project")
+    if project.employee_ids:
+        await table_versions.abump("employee")
 
     # Fetch the project again to get the updated employee count
-    updated_project = db.query(Project).options(
-        joinedload(Project.employees)
-    ).filter(Project.project_id == new_project.project_id).first()
-
-    # Calculate total employees (if you've set up the relationship)
-    total_employees = len(updated_project.employees) if updated_project else 0
-
-    return ProjectResponse(
-        project_id=updated_project.project_id,
-        project_name=updated_project.project_name,
-        department_name=department.department_name,
-        total_employees=total_employees
-    )
+    return await fetch_project_response(db, new_project.project_id)
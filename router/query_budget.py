@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from sqlalchemy import event
+from database import engine, async_engine, replica_engine, async_replica_engine
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IGNORED_PATHS = (os.path.join(ROOT, "venv"), "site-packages", os.path.abspath(__file__))
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+# Per-route limits, attached to the endpoint by @query_budget. max_repeats defaults to
+# settings.query_repeat_limit, the N+1 check that applies to every route; routes that repeat
+# statements per batch by design turn it off with check_repeats=False.
+@dataclass(frozen=True)
+class QueryBudget:
+    max_queries: Optional[int] = None
+    max_repeats: Optional[int] = None
+    check_repeats: bool = True
+
+
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None, check_repeats: bool = True):
+    # Only marks the endpoint, FastAPI still sees the original function and signature
+    def decorator(endpoint):
+        endpoint.query_budget = QueryBudget(max_queries, max_repeats, check_repeats)
+        return endpoint
+
+    return decorator
+
+
+# Statements of the request being handled, grouped by fingerprint with the call site of
+# the first occurrence
+@dataclass
+class QueryLog:
+    count: int = 0
+    fingerprints: Counter = field(default_factory=Counter)
+    sites: Dict[str, str] = field(default_factory=dict)
+
+
+query_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+WHITESPACE = re.compile(r"\s+")
+
+
+# Same statement shape, same fingerprint: literals and expanded IN lists are folded
+def fingerprint(statement: str) -> str:
+    statement = LITERALS.sub("?", statement)
+    statement = PLACEHOLDER_LIST.sub("(?)", statement)
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def app_frame(frame) -> Optional[str]:
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(ROOT) and not any(ignored in filename for ignored in IGNORED_PATHS):
+            return f"{os.path.relpath(filename, ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def call_site() -> str:
+    site = app_frame(sys._getframe(1))
+    if site is None:
+        # AsyncSession runs the statement in a greenlet, the awaiting code is on the parent's stack
+        import greenlet
+        parent = greenlet.getcurrent().parent
+        site = app_frame(parent.gr_frame) if parent is not None else None
+    return site or "unknown"
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = query_log.get()
+    if log is None:
+        return
+    key = fingerprint(statement)
+    log.count += 1
+    log.fingerprints[key] += 1
+    if key not in log.sites:
+        log.sites[key] = call_site()
+
+
+def instrument_engine(sync_engine):
+    if not event.contains(sync_engine, "after_cursor_execute", after_cursor_execute):
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def violation(scope, log: QueryLog) -> Optional[str]:
+    budget = getattr(getattr(scope.get("route"), "endpoint", None), "query_budget", None) or QueryBudget()
+    max_repeats = budget.max_repeats if budget.max_repeats is not None else settings.query_repeat_limit
+    repeated, repeats = log.fingerprints.most_common(1)[0] if log.fingerprints else ("", 0)
+    if budget.max_queries is not None and log.count > budget.max_queries:
+        problem = f"issued {log.count} statements, budget is {budget.max_queries}"
+    elif budget.check_repeats and repeats > max_repeats:
+        problem = f"repeated one statement {repeats} times, limit is {max_repeats} (N+1?)"
+    else:
+        return None
+    return (
+        f"{scope['method']} {scope['path']} {problem}; "
+        f"most repeated ({repeats}x) at {log.sites.get(repeated)}: {repeated}"
+    )
+
+
+# Pure ASGI middleware for development and tests (QUERY_BUDGET=log|raise). The check runs
+# when the response starts, after the handler and its serialization have queried, so
+# "raise" turns the response into a 500 and fails the test that made the request.
+# Statements a streaming response issues after it starts are not counted.
+class QueryBudgetMiddleware:
+    def __init__(self, app, mode: str = "log"):
+        self.app = app
+        self.mode = mode
+        instrument_engine(engine)
+        instrument_engine(async_engine.sync_engine)
+        if replica_engine is not None:
+            instrument_engine(replica_engine)
+            instrument_engine(async_replica_engine.sync_engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        log = QueryLog()
+        token = query_log.set(log)
+
+        async def check(message):
+            if message["type"] == "http.response.start":
+                problem = violation(scope, log)
+                if problem is not None:
+                    if self.mode == "raise":
+                        raise QueryBudgetExceeded(problem)
+                    logger.warning("query budget exceeded: %s", problem)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, check)
+        finally:
+            query_log.reset(token)
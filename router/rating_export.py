@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterator
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from database import db_dependency, routed_session_local
+from models.departments import Department
+from models.employee import Employee
+from models.performanceparameter import PerformanceParameter
+from models.performancerating import PerformanceRating
+from models.session import SessionModel
+
+router = APIRouter()
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = [
+    "rating_id", "session_id", "emp_id", "employee_id", "employee_name",
+    "department_name", "parameter_id", "parameter_name", "rating", "comments",
+]
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_statement(session_id: int):
+    return (
+        select(
+            PerformanceRating.rating_id,
+            PerformanceRating.session_id,
+            PerformanceRating.emp_id,
+            Employee.employee_id,
+            Employee.employee_name,
+            Department.department_name,
+            PerformanceRating.parameter_id,
+            PerformanceParameter.name.label("parameter_name"),
+            PerformanceRating.rating,
+            PerformanceRating.comments,
+        )
+        .join(Employee, Employee.emp_id == PerformanceRating.emp_id)
+        .outerjoin(Department, Department.department_id == Employee.department_id)
+        .join(PerformanceParameter, PerformanceParameter.parameter_id == PerformanceRating.parameter_id)
+        .where(PerformanceRating.session_id == session_id)
+        .order_by(PerformanceRating.rating_id)
+    )
+
+
+# Rows come off a server-side cursor EXPORT_CHUNK_SIZE at a time and each chunk is encoded
+# into one block, so memory is bounded by the chunk size rather than the session size.
+# The request's session is closed before the body is sent, the generator opens its own.
+def iter_export_rows(session_id: int) -> Iterator[list]:
+    with routed_session_local()() as db:
+        result = db.execute(export_statement(session_id).execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for chunk in result.partitions():
+            yield chunk
+
+def iter_csv(session_id: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in iter_export_rows(session_id):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def iter_ndjson(session_id: int) -> Iterator[bytes]:
+    for chunk in iter_export_rows(session_id):
+        yield "".join(json.dumps(dict(row._mapping)) + "\n" for row in chunk).encode("utf-8")
+
+def gzip_stream(blocks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip header and trailer
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@router.get("/session/{session_id}/export")
+def export_session_ratings(
+    session_id: int,
+    db: db_dependency,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+):
+    if db.get(SessionModel, session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    body = iter_csv(session_id) if format == "csv" else iter_ndjson(session_id)
+    filename = f"session_{session_id}_ratings.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
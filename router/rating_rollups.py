@@ -0,0 +1,180 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import delete, event, func, insert, inspect, select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from models.employee import Employee
+from models.performancerating import PerformanceRating
+from models.ratingrollup import RatingRollupDepartment, RatingRollupEmployee, RatingRollupParameter
+
+NO_DEPARTMENT = 0
+ROLLUP_COLUMNS = ["rating_count", "rating_sum", "rating_sum_sq", "rating_min", "rating_max"]
+
+# Rollup name -> (model, key column)
+ROLLUPS = {
+    "employee": (RatingRollupEmployee, "emp_id"),
+    "parameter": (RatingRollupParameter, "parameter_id"),
+    "department": (RatingRollupDepartment, "department_id"),
+}
+
+
+def rating_key(name: str):
+    if name == "employee":
+        return PerformanceRating.emp_id
+    if name == "parameter":
+        return PerformanceRating.parameter_id
+    return func.coalesce(Employee.department_id, NO_DEPARTMENT)
+
+
+def aggregate_statement(name: str, *criteria):
+    key = ROLLUPS[name][1]
+    key_expr = rating_key(name)
+    stmt = select(
+        PerformanceRating.session_id,
+        key_expr.label(key),
+        func.count(),
+        func.sum(PerformanceRating.rating),
+        func.sum(PerformanceRating.rating * PerformanceRating.rating),
+        func.min(PerformanceRating.rating),
+        func.max(PerformanceRating.rating),
+    ).select_from(PerformanceRating)
+    if name == "department":
+        stmt = stmt.outerjoin(Employee, Employee.emp_id == PerformanceRating.emp_id)
+    return stmt.where(*criteria).group_by(PerformanceRating.session_id, key_expr)
+
+
+def insert_aggregates(conn: Connection, name: str, *criteria):
+    model, key = ROLLUPS[name]
+    conn.execute(insert(model).from_select(["session_id", key] + ROLLUP_COLUMNS, aggregate_statement(name, *criteria)))
+
+
+# Backfill: recompute the rollups from tbl_performance_rating, for some sessions or all of them
+def rebuild_rollups(conn: Connection, session_ids: Optional[Iterable[int]] = None):
+    session_ids = list(session_ids) if session_ids is not None else None
+    for name, (model, _) in ROLLUPS.items():
+        if session_ids is None:
+            conn.execute(delete(model))
+            insert_aggregates(conn, name)
+        else:
+            conn.execute(delete(model).where(model.session_id.in_(session_ids)))
+            insert_aggregates(conn, name, PerformanceRating.session_id.in_(session_ids))
+
+
+# Recompute a few groups exactly, used when ratings are deleted or changed (min/max can't be decremented)
+def refresh_groups(conn: Connection, groups: Dict[str, Set[Tuple[int, int]]]):
+    for name, keys in groups.items():
+        if not keys:
+            continue
+        model, key = ROLLUPS[name]
+        keys = list(keys)
+        conn.execute(delete(model).where(tuple_(model.session_id, getattr(model, key)).in_(keys)))
+        insert_aggregates(conn, name, tuple_(PerformanceRating.session_id, rating_key(name)).in_(keys))
+
+
+def employee_departments(conn: Connection, emp_ids: Set[int]) -> Dict[int, int]:
+    if not emp_ids:
+        return {}
+    return dict(conn.execute(
+        select(Employee.emp_id, func.coalesce(Employee.department_id, NO_DEPARTMENT)).where(Employee.emp_id.in_(emp_ids))
+    ).all())
+
+
+def upsert_statement(conn: Connection, model, key: str):
+    table = model.__table__
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        incoming, least, greatest = stmt.inserted, func.least, func.greatest
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+        incoming = stmt.excluded
+        least, greatest = (func.min, func.max) if dialect == "sqlite" else (func.least, func.greatest)
+    else:
+        return None
+    values = {
+        "rating_count": table.c.rating_count + incoming.rating_count,
+        "rating_sum": table.c.rating_sum + incoming.rating_sum,
+        "rating_sum_sq": table.c.rating_sum_sq + incoming.rating_sum_sq,
+        "rating_min": least(table.c.rating_min, incoming.rating_min),
+        "rating_max": greatest(table.c.rating_max, incoming.rating_max),
+    }
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(**values)
+    return stmt.on_conflict_do_update(index_elements=["session_id", key], set_=values)
+
+
+# Incremental path for new ratings: fold them into per-group deltas and upsert each rollup once
+def add_ratings(conn: Connection, ratings: Iterable[dict]):
+    ratings = list(ratings)
+    if not ratings:
+        return
+    departments = employee_departments(conn, {rating["emp_id"] for rating in ratings})
+    deltas = {name: defaultdict(lambda: [0, 0, 0, None, None]) for name in ROLLUPS}
+    for rating in ratings:
+        value = rating["rating"]
+        keys = {
+            "employee": rating["emp_id"],
+            "parameter": rating["parameter_id"],
+            "department": departments.get(rating["emp_id"], NO_DEPARTMENT),
+        }
+        for name, key in keys.items():
+            delta = deltas[name][(rating["session_id"], key)]
+            delta[0] += 1
+            delta[1] += value
+            delta[2] += value * value
+            delta[3] = value if delta[3] is None else min(delta[3], value)
+            delta[4] = value if delta[4] is None else max(delta[4], value)
+
+    for name, groups in deltas.items():
+        model, key = ROLLUPS[name]
+        stmt = upsert_statement(conn, model, key)
+        if stmt is None:
+            refresh_groups(conn, {name: set(groups)})
+            continue
+        conn.execute(stmt, [
+            {"session_id": session_id, key: group_key, **dict(zip(ROLLUP_COLUMNS, delta))}
+            for (session_id, group_key), delta in groups.items()
+        ])
+
+
+def previous_value(obj, attribute: str):
+    history = inspect(obj).attrs[attribute].history
+    return history.deleted[0] if history.deleted else getattr(obj, attribute)
+
+
+def rating_groups(conn: Connection, ratings: Iterable[dict]) -> Dict[str, Set[Tuple[int, int]]]:
+    ratings = list(ratings)
+    departments = employee_departments(conn, {rating["emp_id"] for rating in ratings})
+    return {
+        "employee": {(r["session_id"], r["emp_id"]) for r in ratings},
+        "parameter": {(r["session_id"], r["parameter_id"]) for r in ratings},
+        "department": {(r["session_id"], departments.get(r["emp_id"], NO_DEPARTMENT)) for r in ratings},
+    }
+
+
+RATING_FIELDS = ("session_id", "emp_id", "parameter_id", "rating")
+
+
+# ORM writes to PerformanceRating keep the rollups current inside the same transaction.
+# Core bulk inserts don't emit flush events and call add_ratings() themselves.
+@event.listens_for(Session, "after_flush")
+def maintain_rating_rollups(session, flush_context):
+    added, touched = [], []
+    for obj in session.new:
+        if isinstance(obj, PerformanceRating):
+            added.append({field: getattr(obj, field) for field in RATING_FIELDS})
+    for obj in session.deleted:
+        if isinstance(obj, PerformanceRating):
+            touched.append({field: previous_value(obj, field) for field in RATING_FIELDS})
+    for obj in session.dirty:
+        if isinstance(obj, PerformanceRating) and session.is_modified(obj):
+            touched.append({field: previous_value(obj, field) for field in RATING_FIELDS})
+            touched.append({field: getattr(obj, field) for field in RATING_FIELDS})
+    if not added and not touched:
+        return
+    conn = session.connection()
+    if added:
+        add_ratings(conn, added)
+    if touched:
+        refresh_groups(conn, rating_groups(conn, touched))
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import select, update
+from starlette.requests import cookie_parser
+from database import engine, replica_engine, read_route
+from models.replicaheartbeat import ReplicaHeartbeat
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ("GET", "HEAD")
+STICKY_COOKIE = "db_primary_until"
+
+
+# Last measurement of the replica. lag_seconds is how far its heartbeat trails the primary's,
+# so it is known to within replica_check_seconds.
+@dataclass(frozen=True)
+class ReplicaState:
+    usable: bool = False
+    lag_seconds: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[float] = None
+
+
+def measure_lag() -> float:
+    with engine.connect() as conn:
+        primary_beat = conn.scalar(select(ReplicaHeartbeat.beat_ms).where(ReplicaHeartbeat.heartbeat_id == 1))
+    with replica_engine.connect() as conn:
+        replica_beat = conn.scalar(select(ReplicaHeartbeat.beat_ms).where(ReplicaHeartbeat.heartbeat_id == 1))
+    if primary_beat is None or replica_beat is None:
+        raise RuntimeError("no heartbeat row, run the migrations on the primary")
+    return max(0, primary_beat - replica_beat) / 1000
+
+
+def write_heartbeat():
+    with engine.begin() as conn:
+        conn.execute(
+            update(ReplicaHeartbeat).where(ReplicaHeartbeat.heartbeat_id == 1)
+            .values(beat_ms=int(time.time() * 1000))
+        )
+
+
+# Reads go to the replica only while it answers and, with lag fallback on, is within
+# replica_max_lag_seconds of the primary. Every worker measures, then stamps the heartbeat
+# for the next measurement; until the first measurement reads stay on the primary.
+class ReplicaMonitor:
+    def __init__(self):
+        self.state = ReplicaState()
+        self._task: Optional[asyncio.Task] = None
+
+    def check_once(self) -> ReplicaState:
+        checked_at = time.time()
+        try:
+            lag = measure_lag()
+        except Exception as e:
+            state = ReplicaState(usable=False, error=str(e), checked_at=checked_at)
+        else:
+            lagging = settings.replica_lag_fallback and lag > settings.replica_max_lag_seconds
+            state = ReplicaState(usable=not lagging, lag_seconds=lag, checked_at=checked_at)
+        if state.usable != self.state.usable:
+            logger.warning("read replica %s: lag=%s error=%s", "in use" if state.usable else "bypassed",
+                           state.lag_seconds, state.error)
+        self.state = state
+        write_heartbeat()
+        return state
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.check_once)
+            except Exception:
+                logger.exception("replica heartbeat failed")
+            await asyncio.sleep(settings.replica_check_seconds)
+
+    def start(self):
+        if self._task is None and replica_engine is not None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def sticky(scope) -> bool:
+    header = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"cookie"), "")
+    try:
+        until = float(cookie_parser(header).get(STICKY_COOKIE, 0))
+    except ValueError:
+        return False
+    # Bounded by the window so a forged cookie can't pin a client to the primary for long
+    return time.time() < until <= time.time() + settings.replica_sticky_seconds
+
+
+def sticky_cookie() -> bytes:
+    until = time.time() + settings.replica_sticky_seconds
+    max_age = math.ceil(settings.replica_sticky_seconds)
+    return f"{STICKY_COOKIE}={until:.3f}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax".encode("latin-1")
+
+
+# Pure ASGI middleware choosing the database the request's sessions read from. A successful
+# write sets a cookie that keeps the client's reads on the primary for replica_sticky_seconds,
+# so it reads its own writes while the replica catches up.
+class ReadRoutingMiddleware:
+    def __init__(self, app, monitor: ReplicaMonitor = replica_monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if scope["method"] in READ_METHODS:
+            if sticky(scope):
+                route = "sticky"
+            else:
+                route = "replica" if self.monitor.state.usable else "primary"
+            token = read_route.set(route)
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                read_route.reset(token)
+
+        async def mark_writer(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", sticky_cookie())]}
+            await send(message)
+
+        await self.app(scope, receive, mark_writer)
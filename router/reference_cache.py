@@ -0,0 +1,122 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select
+from models.departments import Department
+from models.employee import Employee
+from models.performanceparameter import PerformanceParameter
+from models.project import Project
+from settings import settings
+from .etag import replica_may_be_stale, table_versions
+from .tenancy import current_org_id
+
+
+# Each reference table: the statement that loads it whole, its id column and its name column
+REFERENCE_TABLES = {
+    "department": (
+        lambda: select(Department.department_id, Department.department_name).order_by(Department.department_id),
+        "department_id", "department_name",
+    ),
+    "project": (
+        lambda: select(Project.project_id, Project.project_name, Project.department_id).order_by(Project.project_id),
+        "project_id", "project_name",
+    ),
+    "parameter": (
+        lambda: select(
+            PerformanceParameter.parameter_id,
+            PerformanceParameter.name,
+            PerformanceParameter.min_rating,
+            PerformanceParameter.max_rating,
+        ).order_by(PerformanceParameter.parameter_id),
+        "parameter_id", "name",
+    ),
+    "manager": (
+        lambda: select(Employee.emp_id, Employee.employee_name)
+        .where(Employee.role == "Manager")
+        .order_by(Employee.emp_id),
+        "emp_id", "employee_name",
+    ),
+}
+
+
+@dataclass
+class ReferenceSnapshot:
+    version: int
+    expires: float
+    by_id: Dict[int, Any] = field(default_factory=dict)
+    by_name: Dict[str, int] = field(default_factory=dict)
+
+    def id_for(self, name):
+        return self.by_name.get(name)
+
+    def row_for_name(self, name):
+        key = self.by_name.get(name)
+        return self.by_id.get(key) if key is not None else None
+
+
+# Whole-table snapshots of the small lookup tables with O(1) name -> id and id -> row maps.
+# Snapshots are per tenant, the loading query is scoped by the session's tenant filter.
+# Write handlers call invalidate() after commit, which bumps the table version for every
+# tenant; a snapshot loaded under an older version is never served again.
+class ReferenceCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._versions: Dict[str, int] = {table: 0 for table in REFERENCE_TABLES}
+        self._snapshots: Dict[Tuple[str, Optional[int]], ReferenceSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def version(self, table: str) -> int:
+        return self._versions[table]
+
+    def invalidate(self, *tables: str):
+        self._drop(tables)
+        table_versions.bump(*tables)
+
+    async def ainvalidate(self, *tables: str):
+        self._drop(tables)
+        await table_versions.abump(*tables)
+
+    def _drop(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+            self._snapshots = {key: snapshot for key, snapshot in self._snapshots.items() if key[0] not in tables}
+
+    def _cached(self, table: str):
+        snapshot = self._snapshots.get((table, current_org_id()))
+        if snapshot and snapshot.version == self._versions[table] and snapshot.expires > time.monotonic():
+            return snapshot
+        return None
+
+    def _store(self, table: str, version: int, rows) -> ReferenceSnapshot:
+        _, id_column, name_column = REFERENCE_TABLES[table]
+        snapshot = ReferenceSnapshot(version=version, expires=time.monotonic() + self.ttl)
+        for row in rows:
+            key = getattr(row, id_column)
+            snapshot.by_id[key] = row
+            # Rows are ordered by id, so a duplicated name resolves to its first row like .first() did
+            snapshot.by_name.setdefault(getattr(row, name_column), key)
+        if replica_may_be_stale((table,)):
+            return snapshot
+        with self._lock:
+            if self._versions[table] == version:
+                self._snapshots[(table, current_org_id())] = snapshot
+        return snapshot
+
+    def get(self, db, table: str) -> ReferenceSnapshot:
+        snapshot = self._cached(table)
+        if snapshot is None:
+            version = self._versions[table]
+            snapshot = self._store(table, version, db.execute(REFERENCE_TABLES[table][0]()).all())
+        return snapshot
+
+    async def aget(self, db, table: str) -> ReferenceSnapshot:
+        snapshot = self._cached(table)
+        if snapshot is None:
+            version = self._versions[table]
+            snapshot = self._store(table, version, (await db.execute(REFERENCE_TABLES[table][0]())).all())
+        return snapshot
+
+
+reference_cache = ReferenceCache(ttl=settings.reference_cache_ttl)
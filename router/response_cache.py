@@ -0,0 +1,225 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from starlette.requests import Request
+from starlette.routing import Match
+from database import read_route
+from settings import settings
+from .etag import etag_matches, replica_may_be_stale, table_versions
+from .tenancy import current_tenant
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+# Per-route cache settings, attached to the endpoint by @cache_response
+@dataclass(frozen=True)
+class CacheRule:
+    ttl: float
+    tags: Tuple[str, ...]
+    vary: str  # "public", "org" or "user": whose requests may share an entry
+
+
+def cache_response(ttl: float = 60, tags: Tuple[str, ...] = (), vary: str = "org"):
+    if vary not in ("public", "org", "user"):
+        raise ValueError(f"Unknown cache vary {vary!r}")
+
+    # Only marks the endpoint, FastAPI still sees the original function and signature
+    def decorator(endpoint):
+        endpoint.response_cache = CacheRule(ttl=ttl, tags=tuple(tags), vary=vary)
+        return endpoint
+
+    return decorator
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list
+    body: bytes
+    expires: float
+    versions: Tuple[Tuple[str, int], ...]  # tag versions when the handler started
+    size: int
+
+    def fresh(self) -> bool:
+        return self.expires > time.monotonic() and all(
+            table_versions.get(tag) == version for tag, version in self.versions
+        )
+
+
+# LRU of whole response bodies bounded by total bytes. Tags are the table names the ETags
+# already use, so a bump from a write handler or a router-level write makes entries stale.
+# Only the middleware touches it and it runs on the event loop, so there is no lock.
+class ResponseCache:
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def get(self, key) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and not entry.fresh():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry: CachedResponse):
+        if entry.size > self.max_entry_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        self.stores += 1
+        while self.size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+response_cache = ResponseCache(settings.response_cache_max_bytes, settings.response_cache_max_entry_bytes)
+
+
+# Who may share an entry: everyone, the tenant set by TenantMiddleware or the token's subject.
+# None means the token doesn't decode, those requests go straight to the handler.
+def vary_key(rule: CacheRule) -> Optional[str]:
+    if rule.vary == "public":
+        return "public"
+    tenant = current_tenant.get()
+    if not tenant.valid:
+        return None
+    return f"org:{tenant.org_id}" if rule.vary == "org" else f"user:{tenant.subject}"
+
+
+# Pure ASGI middleware: serves GETs of @cache_response routes from memory and bumps the
+# tags of a router after any successful write under its prefix. It sits inside CORS so
+# cached bodies never carry another origin's CORS headers, and inside TenantMiddleware.
+class ResponseCacheMiddleware:
+    def __init__(self, app, write_tags: Dict[str, Tuple[str, ...]], cache: ResponseCache = response_cache):
+        self.app = app
+        self.write_tags = write_tags
+        self.cache = cache
+        self._rules = None
+
+    def rules(self, app):
+        if self._rules is None:
+            self._rules = [
+                (route, route.endpoint.response_cache)
+                for route in app.routes
+                if hasattr(getattr(route, "endpoint", None), "response_cache")
+            ]
+        return self._rules
+
+    def rule_for(self, scope) -> Tuple[Optional[object], Optional[CacheRule]]:
+        for route, rule in self.rules(scope["app"]):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route, rule
+        return None, None
+
+    def tags_for_write(self, path: str) -> Tuple[str, ...]:
+        for prefix, tags in self.write_tags.items():
+            if path == prefix or path.startswith(prefix + "/"):
+                return tags
+        return ()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if scope["method"] not in SAFE_METHODS:
+            return await self.write(scope, receive, send)
+        route, rule = self.rule_for(scope)
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        request = Request(scope)
+        vary = vary_key(rule)
+        if vary is None:
+            return await self.app(scope, receive, send)
+        key = (scope["method"], scope["path"], tuple(sorted(request.query_params.multi_items())), vary)
+
+        # A client that just wrote reads from the primary, past entries the replica may have filled
+        if "no-cache" not in request.headers.get("cache-control", "") and read_route.get() != "sticky":
+            entry = self.cache.get(key)
+            if entry is not None:
+                # The router never sees a hit, record the route for the metrics middleware
+                scope["route"] = route
+                return await self.replay(entry, request, send)
+
+        versions = tuple((tag, table_versions.get(tag)) for tag in rule.tags)
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {**message, "headers": [*message["headers"], (b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+        headers = start.get("headers", [])
+        if start.get("status") != 200 or any(name.lower() == b"set-cookie" for name, _ in headers):
+            return
+        if replica_may_be_stale(rule.tags):
+            return
+        body = b"".join(chunks)
+        self.cache.put(key, CachedResponse(
+            status=200,
+            headers=list(headers),
+            body=body,
+            expires=time.monotonic() + rule.ttl,
+            versions=versions,
+            size=len(body) + sum(len(name) + len(value) for name, value in headers),
+        ))
+
+    async def replay(self, entry: CachedResponse, request: Request, send):
+        etag = next((value.decode("latin-1") for name, value in entry.headers if name.lower() == b"etag"), None)
+        if etag and etag_matches(request, etag):
+            headers = [(name, value) for name, value in entry.headers if name.lower() in (b"etag", b"cache-control")]
+            await send({"type": "http.response.start", "status": 304, "headers": [*headers, (b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": [*entry.headers, (b"x-cache", b"HIT")]})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    async def write(self, scope, receive, send):
+        tags = self.tags_for_write(scope["path"])
+        if not tags:
+            return await self.app(scope, receive, send)
+
+        # Bump once the handler has answered successfully, it has committed by then
+        async def bump_on_success(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                await table_versions.abump(*tags)
+            await send(message)
+
+        await self.app(scope, receive, bump_on_success)
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from typing import Any, Iterable, Tuple
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.engine import Row
+
+
+# One compiled validator/serializer per response type, built on first use
+@lru_cache(maxsize=None)
+def type_adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+@lru_cache(maxsize=None)
+def schema_fields(model) -> Tuple[str, ...]:
+    return tuple(model.model_fields)
+
+
+# Computed responses: validated once and dumped to JSON by pydantic-core. Returning a Response
+# skips FastAPI's second validation against response_model and its jsonable_encoder pass;
+# response_model still documents the schema.
+def serialize(response_type, data: Any, status_code: int = 200) -> Response:
+    adapter = type_adapter(response_type)
+    return Response(
+        adapter.dump_json(adapter.validate_python(data, from_attributes=True)),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+# Listings straight from the database: the columns already have the schema's types, so rows
+# (result rows or ORM objects) are projected onto the schema's fields and handed to orjson
+# without building or validating a model per row
+def project_rows(model, rows: Iterable) -> list:
+    fields = schema_fields(model)
+    projected = []
+    for row in rows:
+        if isinstance(row, Row):
+            # Keyed access on the row mapping is several times faster than Row attributes
+            mapping = row._mapping
+            projected.append({field: mapping[field] for field in fields})
+        else:
+            projected.append({field: getattr(row, field) for field in fields})
+    return projected
+
+
+def rows_response(model, rows: Iterable) -> ORJSONResponse:
+    return ORJSONResponse(project_rows(model, rows))
+
+
+def page_response(model, page: dict) -> ORJSONResponse:
+    return ORJSONResponse({**page, "items": project_rows(model, page["items"])})
+
+
+# Untyped responses: ORM instances become their column values, orjson handles dates and enums
+def jsonable(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {key: jsonable(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [jsonable(value) for value in data]
+    if isinstance(data, BaseModel):
+        return data.model_dump(mode="json")
+    state = sa_inspect(data, raiseerr=False)
+    if state is not None and hasattr(state, "mapper"):
+        return {attr.key: getattr(data, attr.key) for attr in state.mapper.column_attrs}
+    return data
+
+
+def json_response(data: Any, status_code: int = 200) -> ORJSONResponse:
+    return ORJSONResponse(jsonable(data), status_code=status_code)
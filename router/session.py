@@ -1,16 +1,25 @@
-from database import engine, connect_db, db_dependency
+from database import connect_db, db_dependency
+from .pagination import Page, pagination_dependency, paginate
+from .serialization import page_response
+from .etag import ConditionalGet, table_versions, with_etag
 from models.session import SessionModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from pydantic import BaseModel
 from typing import List
 # from datetime import date
 from datetime import date as current_date
 from typing import Optional
 from datetime import datetime, date
+from enum import Enum
 
 router = APIRouter()
-SessionModel.metadata.create_all(bind=engine)
+
+class SessionStatus(str, Enum):
+    new = "New"
+    active = "Active"
+    closed = "Closed"
 
 # Pydantic schema for creating a session (POST request)
 class SessionCreate(BaseModel):
@@ -36,6 +45,8 @@ class SessionUpdate(BaseModel):
     end_date: Optional[current_date] = None        
 
 
+# Status at write time; session_status.status_case is the same rule as one SQL CASE,
+# which the scheduler applies to all sessions when the date changes
 def determine_status(start_date: date, end_date: date) -> str:
     today = datetime.today().date()  # Get today's date
     
@@ -69,14 +80,28 @@ def create_session(session_data: SessionCreate, db: db_dependency):
     )
     db.add(db_session)
     db.commit()
+    table_versions.bump("session")
     db.refresh(db_session)
     return db_session
 
-# GET: Fetch all sessions
-@router.get("/sessions/", response_model=List[SessionRead])
-def read_sessions(db: db_dependency):
-    sessions = db.query(SessionModel).all()
-    return sessions
+# GET: Fetch all sessions, optionally by status and overlapping a date range
+@router.get("/sessions/", response_model=Page[SessionRead])
+def read_sessions(
+    db: db_dependency,
+    page: pagination_dependency,
+    status: Optional[SessionStatus] = None,
+    from_date: Optional[current_date] = Query(None, description="sessions ending on or after this date"),
+    to_date: Optional[current_date] = Query(None, description="sessions starting on or before this date"),
+    etag: Optional[str] = Depends(ConditionalGet("session")),
+):
+    stmt = select(SessionModel)
+    if status is not None:
+        stmt = stmt.where(SessionModel.status == status.value)
+    if from_date is not None:
+        stmt = stmt.where(SessionModel.end_date >= from_date)
+    if to_date is not None:
+        stmt = stmt.where(SessionModel.start_date <= to_date)
+    return with_etag(page_response(SessionRead, paginate(db, stmt, [SessionModel.session_id], page)), etag)
 
 # DELETE: Delete a session by session_id
 @router.delete("/sessions/{session_id}", response_model=SessionRead)
@@ -88,6 +113,7 @@ def delete_session(session_id: int, db: db_dependency):
     
     db.delete(db_session)
     db.commit()
+    table_versions.bump("session")
     return db_session
 
 # PATCH: Update a session by session_id
@@ -110,5 +136,6 @@ def update_session(session_id: int, session_data: SessionUpdate, db: db_dependen
     db_session.status = determine_status(db_session.start_date, db_session.end_date)
 
     db.commit()
+    table_versions.bump("session")
     db.refresh(db_session)
     return db_session
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import case, literal, update
+from database import engine
+from models.session import SessionModel
+from settings import settings
+from .etag import table_versions
+
+logger = logging.getLogger(__name__)
+
+
+# The set-based form of session.determine_status, evaluated for every row at once
+def status_case(today: date):
+    today = literal(today, SessionModel.start_date.type)
+    return case(
+        (SessionModel.start_date == today, "New"),
+        ((SessionModel.start_date <= today) & (today <= SessionModel.end_date), "Active"),
+        (today > SessionModel.end_date, "Closed"),
+        else_="New",
+    )
+
+
+# One UPDATE moves every session whose stored status is stale for `today`, returns the row count
+def refresh_session_statuses(conn, today: Optional[date] = None) -> int:
+    expected = status_case(today or datetime.today().date())
+    return conn.execute(
+        update(SessionModel).where(SessionModel.status != expected).values(status=expected)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def seconds_until_next_day(now: datetime) -> float:
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() + settings.session_status_grace_seconds
+
+
+# Statuses only change when the date does, so the worker refreshes once at boot and then
+# at every local midnight. Every worker runs it, the UPDATE is idempotent.
+class SessionStatusScheduler:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def run_once(self) -> int:
+        with engine.begin() as conn:
+            updated = refresh_session_statuses(conn)
+        if updated:
+            table_versions.bump("session")
+        return updated
+
+    async def _run(self):
+        while True:
+            try:
+                updated = await asyncio.to_thread(self.run_once)
+                if updated:
+                    logger.info("session statuses refreshed: %s sessions changed", updated)
+            except Exception:
+                logger.exception("session status refresh failed")
+            await asyncio.sleep(seconds_until_next_day(datetime.now()))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+session_status_scheduler = SessionStatusScheduler()
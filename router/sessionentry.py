@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
-from database import engine, db_dependency
+from database import db_dependency
 from models.sessionentry import SessionEntryModal
 from models.organization import Organization  # Removed RoleEnum import
 from models.session import SessionModel
@@ -11,7 +11,8 @@ from sqlalchemy.orm import aliased
 from datetime import date as current_date
 from models.performanceparameter import PerformanceParameter
 from models.performancerating import PerformanceRating
-from sqlalchemy import and_, or_
+from router.performancerating import RatingItem, RatingSubmissionResult, insert_ratings
+from sqlalchemy import and_, func, or_, select
 
 session = Session()
 import logging
@@ -19,7 +20,6 @@ import logging
 logging.basicConfig(level=logging.INFO)
 
 router = APIRouter()
-SessionEntryModal.metadata.create_all(bind=engine)
 
 class SessionEntryCreate(BaseModel):
     emp_id: int 
@@ -55,12 +55,20 @@ def read_employees(session_id: int, db: db_dependency):
 
 @router.post("/api/submit")
 def submit_rating(emp_id: int, session_id: int,parameter_id: int, db: db_dependency,rating: int, comments: str = None):
-    # Create a new performance rating
-    new_rating = PerformanceRating(emp_id=emp_id, session_id=session_id,parameter_id=parameter_id, rating=rating, comments=comments)
-    db.add(new_rating)
-    db.commit()
-    db.refresh(new_rating)
-    return {"message": "Rating submitted successfully!", "rating_id": new_rating.rating_id}
-
-
+    # Same checks (session, employee, parameter, rating range) and rollup upkeep as the bulk path
+    result = insert_ratings(db, session_id, [RatingItem(emp_id=emp_id, parameter_id=parameter_id, rating=rating, comments=comments)])
+    if result.failures:
+        raise HTTPException(status_code=400, detail=result.failures[0].error)
+    rating_id = db.scalar(
+        select(func.max(PerformanceRating.rating_id)).where(
+            PerformanceRating.emp_id == emp_id,
+            PerformanceRating.session_id == session_id,
+            PerformanceRating.parameter_id == parameter_id,
+        )
+    )
+    return {"message": "Rating submitted successfully!", "rating_id": rating_id}
 
+# Several ratings in one request, validated together and inserted with one commit
+@router.post("/api/submit/bulk", response_model=RatingSubmissionResult)
+def submit_ratings_bulk(session_id: int, ratings: List[RatingItem], db: db_dependency):
+    return insert_ratings(db, session_id, ratings)
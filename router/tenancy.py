@@ -0,0 +1,114 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session, with_loader_criteria
+from models.tenant import TenantScoped
+from .users.login import decode_token
+
+
+# Whose data the request may see, from the bearer token's claims. Outside a request (the
+# scheduler, scripts) there is no tenant and nothing is scoped; an HTTP request without an
+# org_id (no token, a bad token, a principal without an organization) may not touch tenant tables.
+@dataclass(frozen=True)
+class Tenant:
+    org_id: Optional[int] = None
+    subject: Optional[str] = None
+    valid: bool = True  # False when a token was sent but doesn't decode
+    request: bool = True  # False outside HTTP requests
+
+
+UNSCOPED = Tenant(request=False)
+ANONYMOUS = Tenant()
+INVALID = Tenant(valid=False)
+
+current_tenant: ContextVar[Tenant] = ContextVar("current_tenant", default=UNSCOPED)
+
+
+def current_org_id() -> Optional[int]:
+    return current_tenant.get().org_id
+
+
+# The org_id tenant tables are scoped to, None when unscoped; refuses requests without a tenant
+def required_org_id() -> Optional[int]:
+    tenant = current_tenant.get()
+    if tenant.org_id is None and tenant.request:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return tenant.org_id
+
+
+def tenant_from_authorization(authorization: str) -> Tenant:
+    scheme, _, token = authorization.partition(" ")
+    if not token:
+        return ANONYMOUS
+    claims = decode_token(token) if scheme.lower() == "bearer" else None
+    if claims is None:
+        return INVALID
+    return Tenant(org_id=claims.get("org_id"), subject=claims.get("sub"))
+
+
+# Row values for Core and bulk INSERTs, which skip before_flush
+def with_tenant(values: dict) -> dict:
+    org_id = required_org_id()
+    if org_id is not None and values.get("org_id") is None:
+        return {**values, "org_id": org_id}
+    return values
+
+
+# Pure ASGI middleware: decodes the token once and sets the tenant for the whole request,
+# Starlette copies the context into the threadpool and SQLAlchemy into its greenlets
+class TenantMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        authorization = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"authorization"), "")
+        token = current_tenant.set(tenant_from_authorization(authorization))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
+
+
+# Every ORM SELECT, UPDATE and DELETE on a TenantScoped model, including joins and lazy
+# loads, gets "org_id = :tenant"; SELECTs on tenant_shared models also see the NULL rows, which
+# no tenant may change. execution_options(all_tenants=True) opts a statement out
+@event.listens_for(Session, "do_orm_execute")
+def scope_to_tenant(execute_state):
+    if execute_state.execution_options.get("all_tenants"):
+        return
+    if not any(isinstance(mapper.class_, type) and issubclass(mapper.class_, TenantScoped) for mapper in execute_state.all_mappers):
+        return
+    org_id = required_org_id()
+    if org_id is None:
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.is_select:
+        criteria = lambda cls: or_(cls.org_id == org_id, cls.org_id.is_(None)) if cls.tenant_shared else cls.org_id == org_id
+    elif execute_state.is_update or execute_state.is_delete:
+        criteria = lambda cls: cls.org_id == org_id
+    else:
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(TenantScoped, criteria, include_aliases=True)
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def assign_tenant(session, flush_context, instances):
+    new = [obj for obj in session.new if isinstance(obj, TenantScoped) and obj.org_id is None]
+    if not new:
+        return
+    org_id = required_org_id()
+    if org_id is None:
+        return
+    for obj in new:
+        obj.org_id = org_id
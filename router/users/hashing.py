@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from settings import settings
+
+
+class PasswordHasher:
+    # bcrypt releases the GIL while hashing, so a small thread pool runs hashes in parallel
+    # without blocking the event loop. Requests beyond max_pending are shed with a 503.
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._context = None
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def context(self):
+        if self._context is None:
+            from passlib.context import CryptContext
+            # min/max pinned to the configured cost so hashes with any other cost need an update
+            self._context = CryptContext(
+                schemes=["bcrypt"],
+                deprecated="auto",
+                bcrypt__default_rounds=self.rounds,
+                bcrypt__min_rounds=self.rounds,
+                bcrypt__max_rounds=self.rounds,
+            )
+        return self._context
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent password operations, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def hash_sync(self, password: str) -> str:
+        return self.context.hash(password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        # Returns (verified, new_hash), new_hash is set when the stored hash used a different cost
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
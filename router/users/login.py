@@ -3,16 +3,18 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import timedelta, datetime
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import random
 import string
  
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
  
 # Import your database connection and models here
-from database import connect_db
+from database import connect_db, async_db_dependency, async_session_local
 from models.user import Users
+from .hashing import password_hasher
+from .principal import Principal, principal_cache
  
 router = APIRouter()
  
@@ -21,8 +23,6 @@ SECRET_KEY = "83daa0256a2289b0fb23693bf1f6034d44396675749244721a2b20e896e11662"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 8  # 8 hours
  
-# Password hashing setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/Login/token")
  
 # Pydantic models for request/response bodies
@@ -46,77 +46,98 @@ class UserBase(BaseModel):
 class UserInDB(UserBase):
     hashed_password: str
  
-# Utility functions
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# Utility functions, bcrypt runs on the hashing pool so it never blocks the event loop
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
  
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
  
 def generate_random_password() -> str:
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
  
 def get_user(db: Session, user_email: str):
-    print(f"UserMail:{user_email}")
     try:
         user = db.query(Users).filter(Users.user_email == user_email).first()
  
     except Exception as e:
         user = None
-    print(f"User Found:{user}")
     return user
  
-def authenticate_user(db: Session, user_name: str, password: str):
-    user = db.query(Users).filter(Users.user_email == user_name).first()
-    print(user)
+async def load_principal(user_email: str) -> Optional[Principal]:
+    async with async_session_local() as db:
+        result = await db.execute(select(Users).filter(Users.user_email == user_email, Users.is_deleted == False))
+        user = result.scalars().first()
+    return Principal.from_user(user) if user else None
+ 
+async def authenticate_user(db: AsyncSession, user_name: str, password: str):
+    user = (await db.execute(select(Users).filter(Users.user_email == user_name))).scalars().first()
     if not user:
         raise HTTPException(404, "You don't have an account here. Please create one.")
-    if not verify_password(password, user.user_password):
+    verified, new_hash = await password_hasher.verify_and_update(password, user.user_password)
+    if not verified:
         raise HTTPException(404, "Password is not correct! Try again.")
+    if new_hash:
+        # Stored hash used a different bcrypt cost, upgrade it now that we have the plain password
+        user.user_password = new_hash
+        await db.commit()
     return user
  
+# python-jose loads its crypto backends on import, defer that to the first token
+def encode_token(claims: dict) -> str:
+    from jose import jwt
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
 def create_access_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = encode_token(to_encode)
     return encoded_jwt
  
  
 # JWT Authentication and token renewal
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(connect_db)):
+# The principal is cached per subject, so an authenticated request only touches the DB on a cache miss
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"})
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_name: str = payload.get("sub")
-        if user_name is None:
-            raise credentials_exception
-        token_data = TokenData(user_name=user_name)
-    except JWTError:
+    payload = decode_token(token)
+    user_name: str = payload.get("sub") if payload else None
+    if user_name is None:
         raise credentials_exception
-    user = get_user(db, user_email=token_data.user_name)
-    if user is None:
-        raise credentials_exception
-    return user
+    token_data = TokenData(user_name=user_name)
+    principal = principal_cache.get(token_data.user_name)
+    if principal is None:
+        principal = await load_principal(token_data.user_name)
+        if principal is None:
+            raise credentials_exception
+        principal_cache.set(token_data.user_name, principal)
+    return principal
  
-async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)):
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)):
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
  
 # Routes for login and access token
 @router.post("/token/", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(connect_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)  # 'username' used here instead of 'user_name'
+async def login_for_access_token(db: async_db_dependency, form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await authenticate_user(db, form_data.username, form_data.password)  # 'username' used here instead of 'user_name'
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Incorrect username or password",
                             headers={"WWW-Authenticate": "Bearer"})
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": user.user_email, "role": user.role}, expires_delta=access_token_expires)
+    access_token = create_access_token(data=Principal.from_user(user).claims(), expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer", "user_id": user.user_id,
             "user_name": user.user_name, "role": user.role, "org_id": user.org_id}
  
@@ -132,17 +153,15 @@ def verify_token(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_name: str = payload.get("sub")
-        if user_name is None:
-            raise credentials_exception
-        # Reissue token with extended expiration time
-        new_expiration = timedelta(hours=24)
-        new_token = create_access_token(data={"sub": user_name}, expires_delta=new_expiration)
-        return {"token": new_token, "user": payload}
-    except JWTError:
+    payload = decode_token(token)
+    user_name: str = payload.get("sub") if payload else None
+    if user_name is None:
         raise credentials_exception
+    # Reissue token with extended expiration time, keeping the principal claims
+    new_expiration = timedelta(hours=24)
+    claims = {key: value for key, value in payload.items() if key != "exp"}
+    new_token = create_access_token(data=claims, expires_delta=new_expiration)
+    return {"token": new_token, "user": payload}
  
 @router.get("/protected-data/")
 async def get_protected_data(current_user: dict = Depends(verify_token)):
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from settings import settings
+
+
+# What get_current_user hands to routes, built from the Users row once and then served from cache
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    org_id: Optional[int]
+    role: str
+    user_name: Optional[str]
+    user_email: str
+    is_active: bool = True
+
+    @property
+    def disabled(self) -> bool:
+        return not self.is_active
+
+    @property
+    def email(self) -> str:
+        return self.user_email
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            user_id=user.user_id,
+            org_id=user.org_id,
+            role=user.role,
+            user_name=user.user_name,
+            user_email=user.user_email,
+            is_active=user.is_active is not False,
+        )
+
+    def claims(self) -> dict:
+        return {"sub": self.user_email, "user_id": self.user_id, "org_id": self.org_id, "role": self.role}
+
+
+# TTL + LRU cache of principals keyed by token subject. Writes on this worker invalidate
+# immediately, the TTL bounds how long other workers can serve a stale principal.
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            principal, expires = entry
+            if expires < time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def set(self, subject: str, principal: Principal):
+        with self._lock:
+            self._entries[subject] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *subjects: Optional[str]):
+        with self._lock:
+            for subject in subjects:
+                self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl)
@@ -1,16 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 import bcrypt
 from enum import Enum
 from router.basic_import import *
-from database import engine, connect_db, db_dependency  # Ensure this is defined in `database.py`
+from database import engine, connect_db, async_db_dependency  # Ensure this is defined in `database.py`
 from models.user import Users
 from models.organization import Organization
 from .login import get_password_hash, oauth2_scheme,get_current_user
+from .principal import Principal, principal_cache
+from router.pagination import pagination_dependency, apaginate
 from datetime import datetime
-from fastapi.encoders import jsonable_encoder
+from router.serialization import json_response, page_response, project_rows, rows_response
  
 # Users.metadata.create_all(bind=engine)
 router = APIRouter()
@@ -41,30 +44,34 @@ class UserUpdate(BaseModel):
     user_password: Optional[str] = None
     user_dp: Optional[str] = None
  
+# What the user routes return: never the password or OTP hashes
 class UserResponse(BaseModel):
+    user_id: int
     org_id: int
     role: Role
     user_name: str
     user_email: EmailStr
-    user_mobile: str
-    user_dp: str
+    user_mobile: Optional[str] = None
+    user_dp: Optional[str] = None
  
     class Config:
         orm_mode = True
        
 @router.post("/create-users/")
-async def create_user(user: UserCreate, db: db_dependency, current_user:str = Depends(get_current_user)):
+async def create_user(user: UserCreate, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
     # Only HR Admins can create users
     if current_user.role != Role.hr_admin:
         raise HTTPException(status_code=403, detail="Insufficient permissions to create users")
+    if user.org_id != current_user.org_id:
+        raise HTTPException(status_code=403, detail="Users can only be created in your own organization")
  
     # Check if organization exists
-    is_org_found = db.query(Organization).filter(Organization.org_id == user.org_id).first()
+    is_org_found = (await db.execute(select(Organization).filter(Organization.org_id == user.org_id))).scalars().first()
     if not is_org_found:
         raise HTTPException(status_code=404, detail="Organization not found")
  
     # Check if email already exists
-    user_email_exists = db.query(Users).filter(Users.user_email == user.user_email).first()
+    user_email_exists = (await db.execute(select(Users).filter(Users.user_email == user.user_email))).scalars().first()
     if user_email_exists:
         raise HTTPException(status_code=409, detail="Email is already in use by another user")
  
@@ -82,14 +89,14 @@ async def create_user(user: UserCreate, db: db_dependency, current_user:str = De
             user_name=user.user_name,
             user_email=user.user_email,
             user_mobile=user.user_mobile,
-            user_password=get_password_hash(user.user_password),
+            user_password=await get_password_hash(user.user_password),
             user_dp=user.user_dp,
             timestamp=datetime.utcnow()
         )
  
         db.add(user_instance)
-        db.commit()
-        db.refresh(user_instance)
+        await db.commit()
+        await db.refresh(user_instance)
  
         payload = {
             "org_id": user_instance.org_id,
@@ -98,59 +105,66 @@ async def create_user(user: UserCreate, db: db_dependency, current_user:str = De
             "operation": "Created a New User",
         }
  
-        return {"detail": "User created successfully", "user": user_instance, "payload": payload}
+        return {"detail": "User created successfully", "user": project_rows(UserResponse, [user_instance])[0], "payload": payload}
     except Exception as e:
         # You can use logging here
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
    
    
+# Users aren't TenantScoped (login looks them up before there is a tenant), so the routes
+# keep to the caller's organization themselves
+async def org_user(db, user_id: int, current_user: Principal) -> Users:
+    user_instance = (await db.execute(select(Users).filter(
+        Users.user_id == user_id, Users.org_id == current_user.org_id, Users.is_deleted == False
+    ))).scalars().first()
+    if not user_instance:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_instance
+
 @router.get("/get-all-users/")
-async def get_all_users(db: db_dependency):
+async def get_all_users(db: async_db_dependency, page: pagination_dependency, current_user: Principal = Depends(get_current_user)):
     try:
-        users = db.query(Users).filter(Users.is_deleted == False).all()
-        return jsonable_encoder(users)
+        result = await apaginate(db, select(Users).filter(Users.org_id == current_user.org_id, Users.is_deleted == False), [Users.user_id], page)
+        return page_response(UserResponse, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
  
-@router.get("/get-user-by-id/")
-async def get_user_by_id(user_id: int, db: db_dependency):
-    user = await check_instance(Users, "user_id", user_id, db)
-    if user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    try:
-        return jsonable_encoder(user)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+@router.get("/get-user-by-id/", response_model=UserResponse)
+async def get_user_by_id(user_id: int, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    user = await org_user(db, user_id, current_user)
+    return json_response(project_rows(UserResponse, [user])[0])
  
 @router.patch("/users/{user_id}", response_model=UserResponse)
 async def update_user(
     user_id: int,
     user: UserUpdate,
-    db: db_dependency
+    db: async_db_dependency,
+    current_user: Principal = Depends(get_current_user),
 ):
-    user_instance = db.query(Users).filter(Users.user_id == user_id, Users.is_deleted == False).first()
-    if not user_instance:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_instance = await org_user(db, user_id, current_user)
+    previous_email = user_instance.user_email
  
     # Update fields if provided
     if user.user_name is not None:
         user_instance.user_name = user.user_name
     if user.user_email is not None:
-        existing_email_user = db.query(Users).filter(Users.user_email == user.user_email, Users.user_id != user_id).first()
+        existing_email_user = (await db.execute(select(Users).filter(Users.user_email == user.user_email, Users.user_id != user_id))).scalars().first()
         if existing_email_user:
             raise HTTPException(status_code=409, detail="Email is already in use by another user")
         user_instance.user_email = user.user_email
     if user.user_mobile is not None:
         user_instance.user_mobile = user.user_mobile
     if user.user_password is not None:
-        user_instance.user_password = get_password_hash(user.user_password)  # Hash the new password
+        user_instance.user_password = await get_password_hash(user.user_password)  # Hash the new password
     if user.user_dp is not None:
         user_instance.user_dp = user.user_dp
  
-    db.commit()
-    db.refresh(user_instance)
+    await db.commit()
+    await db.refresh(user_instance)
+    principal_cache.invalidate(previous_email, user_instance.user_email)
  
     return UserResponse(
+        user_id=user_instance.user_id,
         org_id=user_instance.org_id,
         role=user_instance.role,
         user_name=user_instance.user_name,
@@ -160,25 +174,21 @@ async def update_user(
     )
  
 @router.delete("/users/{user_id}")
-async def delete_user(user_id: int, db: db_dependency):
-    user_instance = db.query(Users).filter(Users.user_id == user_id, Users.is_deleted == False).first()
-    if not user_instance:
-        raise HTTPException(status_code=404, detail="User not found")
+async def delete_user(user_id: int, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    user_instance = await org_user(db, user_id, current_user)
  
     user_instance.is_deleted = True
-    db.commit()
+    await db.commit()
+    principal_cache.invalidate(user_instance.user_email)
     return {"detail": "User deleted successfully"}
  
 @router.get("/get-users-by-org-id/")
-async def get_users_by_org_id(org_id: int, db: db_dependency):
-    try:
-        users = db.query(Users).filter(Users.org_id == org_id, Users.is_deleted == False).all()
-       
-        if not users:
-            raise HTTPException(status_code=404, detail="No users found for the specified organization ID")
-       
-        return jsonable_encoder(users)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+async def get_users_by_org_id(org_id: int, db: async_db_dependency, current_user: Principal = Depends(get_current_user)):
+    users = []
+    if org_id == current_user.org_id:
+        users = (await db.execute(select(Users).filter(Users.org_id == org_id, Users.is_deleted == False))).scalars().all()
+    if not users:
+        raise HTTPException(status_code=404, detail="No users found for the specified organization ID")
+    return rows_response(UserResponse, users)
  
  
\ No newline at end of file
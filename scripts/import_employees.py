@@ -0,0 +1,37 @@
+# Bulk import employees from a CSV or NDJSON file.
+#
+#   python -m scripts.import_employees employees.csv --org-id 1 [--format ndjson] [--batch-size 5000]
+import argparse
+import sys
+from database import session_local
+from models.organization import Organization
+from router.employee_import import DEFAULT_BATCH_SIZE, EmployeeImporter, detect_format, iter_records
+from router.tenancy import Tenant, current_tenant
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import employees")
+    parser.add_argument("path")
+    parser.add_argument("--org-id", type=int, required=True, help="organization the employees belong to")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = session_local()
+    if db.get(Organization, args.org_id) is None:
+        db.close()
+        parser.error(f"organization {args.org_id} not found")
+    # Imported as the organization's tenant: rows get its org_id, names resolve within its rows only
+    current_tenant.set(Tenant(org_id=args.org_id))
+    try:
+        with open(args.path, "rb") as stream:
+            result = EmployeeImporter(db, args.batch_size).run(iter_records(stream, args.format or detect_format(args.path)))
+    finally:
+        db.close()
+
+    print(result.model_dump_json(indent=2))
+    return 1 if result.failed or result.parse_error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
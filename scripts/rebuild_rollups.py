@@ -0,0 +1,21 @@
+# Recompute the rating rollup tables from tbl_performance_rating.
+#
+#   python -m scripts.rebuild_rollups                 # every session
+#   python -m scripts.rebuild_rollups --session-id 4  # just these sessions
+import argparse
+from database import engine
+from router.rating_rollups import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild rating rollups")
+    parser.add_argument("--session-id", type=int, action="append", dest="session_ids")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        rebuild_rollups(conn, args.session_ids)
+    print("Rollups rebuilt for", "all sessions" if args.session_ids is None else f"sessions {args.session_ids}")
+
+
+if __name__ == "__main__":
+    main()
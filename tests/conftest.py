@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time, so point it at a throwaway SQLite database first
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("SESSION_STATUS_SCHEDULER", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def scale():
+    from benchmarks import datagen
+    scale = datagen.Scale.for_employees(2000)
+    datagen.generate(scale)
+    return scale
+
+
+@pytest.fixture(scope="session")
+def client(scale):
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth(client):
+    from benchmarks import datagen
+
+    def headers(org_id: int) -> dict:
+        response = client.post("/Login/token/", data={"username": datagen.admin_email(org_id), "password": datagen.PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": "Bearer " + response.json()["access_token"]}
+    return headers
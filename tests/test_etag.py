@@ -0,0 +1,31 @@
+from database import read_route
+from router import etag
+from router.etag import TableVersions, load_shared_versions
+
+
+def test_other_workers_writes_mark_replica_reads_stale(monkeypatch, scale):
+    # Two workers in one process: B takes the write, A reads from a replica after refreshing
+    worker_a, worker_b = TableVersions(), TableVersions()
+    worker_a.merge(load_shared_versions())
+    worker_a._bumped_at.clear()
+    monkeypatch.setattr(etag, "table_versions", worker_a)
+    token = read_route.set("replica")
+    try:
+        assert not etag.replica_may_be_stale(("department",))
+        worker_b.bump("department")
+        worker_a.merge(load_shared_versions())
+        assert worker_a.get("department") == worker_b.get("department")
+        assert etag.replica_may_be_stale(("department",))
+    finally:
+        read_route.reset(token)
+
+
+def test_bump_takes_the_shared_version(scale):
+    # A hasn't refreshed since B's writes: its own write must not reuse a version B already issued
+    worker_a, worker_b = TableVersions(), TableVersions()
+    worker_a.merge(load_shared_versions())
+    worker_b.merge(load_shared_versions())
+    worker_b.bump("session")
+    worker_b.bump("session")
+    worker_a.bump("session")
+    assert worker_a.get("session") == worker_b.get("session") + 1 == load_shared_versions()["session"]
@@ -0,0 +1,38 @@
+from sqlalchemy import text
+
+from database import engine
+
+
+def rating_count(emp_id: int, session_id: int) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("select count(*) from tbl_performance_rating where emp_id = :emp_id and session_id = :session_id"),
+            {"emp_id": emp_id, "session_id": session_id},
+        ).scalar()
+
+
+def test_single_rating_is_range_checked(client, auth):
+    # emp_id 2 is datagen's Employee 1, in organization 1 like session 1
+    before = rating_count(2, 1)
+    params = {"emp_id": 2, "session_id": 1, "parameter_id": 1, "rating": 99}
+    response = client.post("/SessionEntry/api/submit", params=params, headers=auth(1))
+    assert response.status_code == 400
+    assert rating_count(2, 1) == before
+
+    response = client.post("/SessionEntry/api/submit", params={**params, "rating": 3}, headers=auth(1))
+    assert response.status_code == 200
+    assert response.json()["rating_id"] is not None
+    assert rating_count(2, 1) == before + 1
+
+
+def test_rate_only_the_managers_reports(client, auth):
+    # Employee 1 (emp_id 2) reports to Employee 0, Employee 9 (emp_id 10) to Employee 1
+    body = {"ratings": [
+        {"emp_id": 2, "ratings": [{"parameter_id": 1, "rating": 3}]},
+        {"emp_id": 10, "ratings": [{"parameter_id": 1, "rating": 3}]},
+    ]}
+    response = client.post("/PerformanceRating/session/2/rate", params={"manager_name": "Employee 0"}, json=body, headers=auth(1))
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 1
+    assert result["failures"] == [{"emp_id": 10, "parameter_id": 1, "error": "Employee does not report to this manager"}]
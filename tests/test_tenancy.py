@@ -0,0 +1,64 @@
+from sqlalchemy import select, text
+
+from database import engine, session_local
+from models.departments import Department
+
+
+def test_anonymous_read_is_refused(client):
+    response = client.get("/Employee/employees/1")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    assert client.get("/Departments/departments/").status_code == 401
+
+
+def test_invalid_token_is_refused(client):
+    response = client.get("/Departments/departments/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_anonymous_write_is_refused(client):
+    response = client.post("/Departments/departments/", json={"department_name": "Anonymous dept"})
+    assert response.status_code == 401
+    with engine.connect() as conn:
+        assert conn.execute(text("select count(*) from tbl_department where department_name = 'Anonymous dept'")).scalar() == 0
+
+
+def test_tenant_reads_and_writes_its_own_rows(client, auth):
+    own, other = auth(1), auth(2)
+    assert client.get("/Employee/employees/1", headers=own).status_code == 200
+    assert client.get("/Employee/employees/1", headers=other).status_code == 404
+
+    response = client.post("/Departments/departments/", json={"department_name": "Tenant dept"}, headers=other)
+    assert response.status_code == 200
+    with engine.connect() as conn:
+        assert conn.execute(text("select org_id from tbl_department where department_name = 'Tenant dept'")).all() == [(2,)]
+
+
+def test_scripts_are_unscoped(client):
+    # No request, no tenant: scripts and the scheduler see every organization
+    with session_local() as db:
+        org_ids = set(db.scalars(select(Department.org_id)))
+    assert {1, 2} <= org_ids
+
+
+def test_shared_rows_are_read_only(client, auth):
+    # datagen's parameters have no org_id: every tenant sees them, none may change them
+    own, other = auth(1), auth(2)
+    response = client.patch("/PerformanceParameter/parameters/1", json={"name": "Hacked", "min_rating": 1, "max_rating": 5}, headers=other)
+    assert response.status_code == 404
+    assert client.delete("/PerformanceParameter/parameters/1", headers=other).status_code == 404
+    assert client.get("/PerformanceParameter/parameters/1", headers=own).json()["name"] != "Hacked"
+
+    # Bulk ORM UPDATEs skip the shared rows too
+    from router.tenancy import Tenant, current_tenant
+    from models.performanceparameter import PerformanceParameter
+    token = current_tenant.set(Tenant(org_id=2))
+    try:
+        with session_local() as db:
+            updated = db.query(PerformanceParameter).filter(PerformanceParameter.parameter_id == 1).update({"name": "Hacked"})
+            db.commit()
+    finally:
+        current_tenant.reset(token)
+    assert updated == 0
+    with engine.connect() as conn:
+        assert conn.execute(text("select name from tbl_performanceparameter where parameter_id = 1")).scalar() != "Hacked"
@@ -0,0 +1,18 @@
+def test_user_listing_needs_a_login(client):
+    assert client.get("/User/get-all-users/").status_code == 401
+
+
+def test_users_are_listed_per_organization_without_secrets(client, auth):
+    response = client.get("/User/get-all-users/", params={"limit": 100}, headers=auth(1))
+    assert response.status_code == 200
+    users = response.json()["items"]
+    assert users and {user["org_id"] for user in users} == {1}
+    assert not {"user_password", "otp_hash"} & set(users[0])
+
+
+def test_other_organizations_users_are_not_found(client, auth):
+    # datagen's admin of organization 2 is user 2
+    assert client.get("/User/get-user-by-id/", params={"user_id": 2}, headers=auth(2)).status_code == 200
+    assert client.get("/User/get-user-by-id/", params={"user_id": 2}, headers=auth(1)).status_code == 404
+    assert client.get("/User/get-users-by-org-id/", params={"org_id": 2}, headers=auth(1)).status_code == 404
+    assert client.delete("/User/users/2", headers=auth(1)).status_code == 404